@@ -1,12 +1,16 @@
 import tkinter as tk
 from tkinter import messagebox
-from database import add_activity, check_activity
+from database import add_activity
+from instrumentation import latency
+from prefetch import load_snapshot
+from refresh_scheduler import Change, ACTIVITY, change_callback
 
 class ActivityTracker:
-    def __init__(self, parent, current_date, update_callback=None):
+    def __init__(self, parent, current_date, update_callback=None, prefetcher=None):
         self.parent = parent
         self.current_date = current_date
-        self.update_callback = update_callback
+        self.update_callback = change_callback(update_callback)
+        self.prefetcher = prefetcher
         self.entries = {}
         self.legend = {
             '1': 'sleep', '2': 'neutral', '3': 'productive', '4': 'waste', 
@@ -54,21 +58,28 @@ class ActivityTracker:
         
         return legend_frame
 
-    def load_activities(self):
-        """Load activities for the current date"""
+    def load_activities(self, snapshot=None):
+        """Load activities for the current date (from snapshot if given)"""
+        snapshot = snapshot or load_snapshot(self.current_date, self.prefetcher)
         for hour in range(24):
-            activity = check_activity(self.current_date.strftime("%d-%m-%Y"), str(hour))
+            activity = snapshot.activity(hour)
             self.entries[hour].delete(0, tk.END)
             if activity:
                 self.entries[hour].insert(0, activity)
 
-    def update_date(self, new_date):
+    def update_date(self, new_date, snapshot=None):
         """Update current date and reload activities"""
         self.current_date = new_date
-        self.load_activities()
+        self.load_activities(snapshot)
+        if self.prefetcher:
+            self.prefetcher.schedule(new_date)
 
     def auto_advance_activity(self, hour, event):
         """Auto-advance to next activity entry after typing a valid character."""
+        with latency.interaction('activity_keystroke', event.widget):
+            self._auto_advance_activity(hour, event)
+
+    def _auto_advance_activity(self, hour, event):
         entry = event.widget
         content = entry.get().lower()
         
@@ -79,6 +90,7 @@ class ActivityTracker:
             # Move to next hour (if not the last hour)
             if hour < 23:
                 self.entries[hour + 1].focus_set()
+                latency.mark('focus_advance')
         
         # If user typed an invalid character or too many characters, clear and stay
         elif len(content) == 1 and content not in self.legend:
@@ -91,6 +103,7 @@ class ActivityTracker:
                 self.save_activity(hour, content[0])
                 if hour < 23:
                     self.entries[hour + 1].focus_set()
+                    latency.mark('focus_advance')
             else:
                 messagebox.showerror("Error", "Invalid activity code. Use codes from the legend.")
                 entry.delete(0, tk.END)
@@ -99,9 +112,11 @@ class ActivityTracker:
         """Save activity and handle validation."""
         if not activity:  # Empty activity is allowed
             current_date = self.current_date.strftime("%d-%m-%Y")
-            add_activity(current_date, str(hour), activity)
-            if self.update_callback:
-                self.update_callback()
+            with latency.stage('database'):
+                changed = add_activity(current_date, str(hour), activity)
+            if changed and self.update_callback:
+                with latency.stage('update_callback'):
+                    self.update_callback(Change(ACTIVITY, current_date))
             return
             
         if len(activity) > 2:
@@ -115,7 +130,10 @@ class ActivityTracker:
             return
         
         current_date = self.current_date.strftime("%d-%m-%Y")
-        add_activity(current_date, str(hour), activity)
+        with latency.stage('database'):
+            changed = add_activity(current_date, str(hour), activity)
         
-        if self.update_callback:
-            self.update_callback()
\ No newline at end of file
+        # Saving again on focus-out (after auto-advance) changes nothing
+        if changed and self.update_callback:
+            with latency.stage('update_callback'):
+                self.update_callback(Change(ACTIVITY, current_date))
\ No newline at end of file
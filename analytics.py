@@ -0,0 +1,223 @@
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import database
+
+# Activity codes used by the trackers; 0 marks an hour with nothing logged
+ACTIVITY_NAMES = {
+    1: 'Sleep', 2: 'Neutral', 3: 'Productive', 4: 'Waste',
+    5: 'Exercise', 6: 'University', 7: 'Social', 8: 'Reading',
+    9: 'Study', 10: 'Transit', 11: 'Work'
+}
+NO_ACTIVITY = 0
+_CODES_BY_TEXT = {str(code): code for code in ACTIVITY_NAMES}
+_HOURS_BY_TEXT = {str(hour): hour for hour in range(24)}
+WEEKDAYS = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+
+# Relationship cutoffs: |r| must reach MIN_R and be significant, i.e. above
+# SIGNIFICANCE_Z / sqrt(days) (the large-sample null distribution of r; 3.29
+# is two-sided p < 0.001, which keeps false findings rare across the
+# hundreds of activity/habit/lag pairs tested)
+MIN_R = 0.1
+SIGNIFICANCE_Z = 3.29
+
+# A correlation between hours spent on an activity `lag` days before and a
+# habit being done, over `days` days where both were recorded
+Relationship = namedtuple('Relationship', ['habit', 'activity', 'lag', 'r', 'days'])
+
+class DayMatrices:
+    """Habits and activities for a range of days as aligned NumPy arrays.
+
+    Row i of every array belongs to days[i]. completed and tracked are
+    days x habits booleans (tracked is False before a habit's tracked_since);
+    activities is days x 24 activity codes, NO_ACTIVITY where an hour was
+    not logged. Rows need not be consecutive days (see concatenate()).
+    """
+    __slots__ = ('days', 'habits', 'completed', 'tracked', 'activities')
+
+    def __init__(self, days: np.ndarray, habits: List[str], completed: np.ndarray,
+                 tracked: np.ndarray, activities: np.ndarray):
+        self.days = days
+        self.habits = habits
+        self.completed = completed
+        self.tracked = tracked
+        self.activities = activities
+
+    def __len__(self):
+        return len(self.days)
+
+    @classmethod
+    def concatenate(cls, parts: Sequence['DayMatrices']) -> 'DayMatrices':
+        """Stack several profiles' matrices into one, over the union of their habits."""
+        habits = sorted({habit for part in parts for habit in part.habits})
+        columns = {habit: i for i, habit in enumerate(habits)}
+        completed, tracked = [], []
+        for part in parts:
+            index = [columns[habit] for habit in part.habits]
+            part_completed = np.zeros((len(part), len(habits)), dtype=bool)
+            part_tracked = np.zeros((len(part), len(habits)), dtype=bool)
+            part_completed[:, index] = part.completed
+            part_tracked[:, index] = part.tracked
+            completed.append(part_completed)
+            tracked.append(part_tracked)
+        return cls(np.concatenate([part.days for part in parts]), habits,
+                   np.concatenate(completed), np.concatenate(tracked),
+                   np.concatenate([part.activities for part in parts]))
+
+    def weekdays(self) -> np.ndarray:
+        """Get the weekday of each row, Monday = 0."""
+        # 1970-01-01, day 0 of datetime64, was a Thursday
+        return (self.days.astype(np.int64) + 3) % 7
+
+    def activity_hours(self) -> np.ndarray:
+        """Get hours logged per activity (ACTIVITY_NAMES order) per day, days x activities."""
+        codes = np.fromiter(ACTIVITY_NAMES, dtype=self.activities.dtype)
+        return (self.activities[:, :, None] == codes).sum(axis=1)
+
+    def logged(self) -> np.ndarray:
+        """Get which days have at least one hour of activity logged."""
+        return (self.activities != NO_ACTIVITY).any(axis=1)
+
+def _to_date(day) -> date:
+    if isinstance(day, datetime):
+        return day.date()
+    if isinstance(day, date):
+        return day
+    return datetime.strptime(day, "%d-%m-%Y").date()
+
+def load_matrices(start, end, include_archived: bool = True) -> DayMatrices:
+    """Load every day from start to end (dates or DD-MM-YYYY strings) in bulk."""
+    start, end = _to_date(start), _to_date(end)
+    days = np.arange(np.datetime64(start, 'D'), np.datetime64(end, 'D') + 1)
+    row_of = {(start + timedelta(days=i)).strftime("%d-%m-%Y"): i for i in range(len(days))}
+
+    activities = np.zeros((len(days), 24), dtype=np.int8)
+    log = database.get_activity_log(row_of, include_archived)
+    # Dict lookups into np.fromiter; unknown activity codes load as NO_ACTIVITY
+    rows = np.fromiter((row_of[day] for day, _, _ in log), np.int64, len(log))
+    hours = np.fromiter((_HOURS_BY_TEXT[hour] for _, hour, _ in log), np.int64, len(log))
+    codes = np.fromiter((_CODES_BY_TEXT.get(activity, NO_ACTIVITY) for _, _, activity in log),
+                        np.int8, len(log))
+    activities[rows, hours] = codes
+
+    completions = database.get_habit_completions(row_of, include_archived)
+    tracked_since = database.get_habit_tracked_since()
+    habits = list(completions)
+    completed = np.zeros((len(days), len(habits)), dtype=bool)
+    tracked = np.zeros((len(days), len(habits)), dtype=bool)
+    for column, habit in enumerate(habits):
+        completed[[row_of[day] for day in completions[habit]], column] = True
+        since = np.datetime64(_to_date(tracked_since[habit]), 'D')
+        tracked[:, column] = days >= since
+    # A check-in always counts, even one stored before tracked_since moved
+    tracked |= completed
+
+    return DayMatrices(days, habits, completed, tracked, activities)
+
+def load_recent(days: int = 3650, include_archived: bool = True) -> DayMatrices:
+    """Load the last `days` days, up to and including today."""
+    end = datetime.now().date()
+    return load_matrices(end - timedelta(days=days - 1), end, include_archived)
+
+def _masked_pearson(x: np.ndarray, y: np.ndarray, mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Correlate every column of x (n x k) with every column of y (n x h).
+
+    Only rows where mask (n x h) is set count towards each column of y.
+    Returns r (k x h, NaN where a column is constant) and the rows used per
+    column of y.
+    """
+    weights = mask.astype(np.float64)
+    x = x.astype(np.float64)
+    y = y.astype(np.float64) * weights
+    n = weights.sum(axis=0)
+
+    sum_x = x.T @ weights
+    sum_xx = (x * x).T @ weights
+    sum_y = y.sum(axis=0)
+    sum_yy = (y * y).sum(axis=0)
+    sum_xy = x.T @ y
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cov = sum_xy - sum_x * sum_y / n
+        var_x = sum_xx - sum_x ** 2 / n
+        var_y = sum_yy - sum_y ** 2 / n
+        r = cov / np.sqrt(var_x * var_y)
+    r[(var_x <= 1e-9) | (var_y <= 1e-9)] = np.nan
+    return np.clip(r, -1.0, 1.0), n.astype(np.int64)
+
+def _lagged(matrices: DayMatrices, lag: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Pair activity hours of each day with habits `lag` days later.
+
+    Returns (activity hours, completed, mask) where mask keeps habit days
+    that were tracked and whose earlier day has activities logged.
+    """
+    hours = matrices.activity_hours()
+    logged = matrices.logged()
+    if lag == 0:
+        return hours, matrices.completed, matrices.tracked & logged[:, None]
+    # Rows are only paired when they really are lag days apart
+    consecutive = (matrices.days[lag:] - matrices.days[:-lag]).astype(np.int64) == lag
+    mask = matrices.tracked[lag:] & (logged[:-lag] & consecutive)[:, None]
+    return hours[:-lag], matrices.completed[lag:], mask
+
+def habit_activity_correlations(matrices: DayMatrices, lag: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """Correlate hours per activity with each habit being done `lag` days later.
+
+    Returns r as an activities x habits array (ACTIVITY_NAMES and
+    matrices.habits order) and the number of days used per habit.
+    """
+    return _masked_pearson(*_lagged(matrices, lag))
+
+def lagged_effects(matrices: DayMatrices, activity: str = 'Sleep',
+                   max_lag: int = 7) -> Tuple[np.ndarray, np.ndarray]:
+    """Correlate one activity with every habit at lags 0..max_lag days.
+
+    Returns r and days used, both (max_lag + 1) x habits.
+    """
+    column = list(ACTIVITY_NAMES.values()).index(activity)
+    effects, counts = [], []
+    for lag in range(max_lag + 1):
+        hours, completed, mask = _lagged(matrices, lag)
+        r, n = _masked_pearson(hours[:, column:column + 1], completed, mask)
+        effects.append(r[0])
+        counts.append(n)
+    return np.array(effects), np.array(counts)
+
+def weekday_profiles(matrices: DayMatrices) -> Tuple[np.ndarray, np.ndarray]:
+    """Get completion rate per weekday and habit (7 x habits) and mean
+    activity hours per weekday on logged days (7 x activities)."""
+    weekday = matrices.weekdays()[:, None] == np.arange(7)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        habit_rates = ((weekday.T.astype(np.int64) @ (matrices.completed & matrices.tracked))
+                       / (weekday.T.astype(np.int64) @ matrices.tracked))
+        logged = weekday & matrices.logged()[:, None]
+        activity_hours = ((logged.T.astype(np.int64) @ matrices.activity_hours())
+                          / logged.sum(axis=0)[:, None])
+    return habit_rates, activity_hours
+
+def strongest_relationships(matrices: DayMatrices, top: int = 10, lags: Iterable[int] = (0, 1),
+                            min_days: int = 30, habits: Optional[List[str]] = None,
+                            min_r: float = MIN_R, z: float = SIGNIFICANCE_Z) -> List[Relationship]:
+    """Get the activity/habit pairs with the largest |r|, over the given lags.
+    
+    Pairs whose |r| is below min_r or not significant (|r| <= z / sqrt(days))
+    are left out, so random data yields an empty list rather than noise.
+    """
+    activities = np.array(list(ACTIVITY_NAMES.values()))
+    candidates = []
+    for lag in lags:
+        r, n = habit_activity_correlations(matrices, lag)
+        r[:, n < min_days] = np.nan
+        with np.errstate(divide='ignore'):
+            cutoff = np.maximum(min_r, z / np.sqrt(n))
+        r[np.abs(r) < cutoff] = np.nan
+        if habits is not None:
+            r[:, [habit not in habits for habit in matrices.habits]] = np.nan
+        activity_index, habit_index = np.nonzero(~np.isnan(r))
+        candidates.extend(
+            Relationship(matrices.habits[h], str(activities[a]), lag, float(r[a, h]), int(n[h]))
+            for a, h in zip(activity_index, habit_index))
+    candidates.sort(key=lambda relationship: abs(relationship.r), reverse=True)
+    return candidates[:top]
@@ -0,0 +1,136 @@
+"""Load test for api_server.py against a synthetic dataset.
+
+Builds a throwaway database with --days days of activities, habits and
+tasks, starts the API server in-process and reports requests/sec and
+latency percentiles for a mix of dashboard-style GET requests.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from database import use_database, initialize_database
+from api_server import serve
+from instrumentation import percentile
+
+HABITS = ['wake_up_7', 'study', 'project', 'github', 'exercise', 'productive_day',
+          'journal', 'reading', 'plan_tomorrow', 'go_to_bed_22']
+
+def build_dataset(db_path: str, days: int, seed: int = 0) -> None:
+    """Fill a database with synthetic data (bulk inserts, not the tracked write path)."""
+    rng = random.Random(seed)
+    with use_database(db_path):
+        initialize_database()
+
+    end_date = datetime.now().date()
+    dates = [(end_date - timedelta(days=i)).strftime("%d-%m-%Y") for i in range(days)]
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.executemany('INSERT OR REPLACE INTO activities (date, hour, activity) VALUES (?, ?, ?)',
+                         [(date, str(hour), str(rng.randint(1, 11)))
+                          for date in dates for hour in range(24)])
+        for habit in HABITS:
+            conn.execute(f'CREATE TABLE IF NOT EXISTS habit_{habit} '
+                         f'(date TEXT PRIMARY KEY, completed BOOLEAN NOT NULL DEFAULT 0)')
+            conn.execute('INSERT OR IGNORE INTO tracked_habits (name, tracked_since) VALUES (?, ?)',
+                         (habit, dates[-1]))
+            conn.executemany(f'INSERT OR REPLACE INTO habit_{habit} (date, completed) VALUES (?, 1)',
+                             [(date,) for date in dates if rng.random() < 0.6])
+        conn.executemany("INSERT INTO todo (date, task, completed, created_at, uid) "
+                         "VALUES (?, ?, ?, datetime('now'), lower(hex(randomblob(16))))",
+                         [(date, f'task {i}', rng.random() < 0.5)
+                          for date in dates for i in range(rng.randint(0, 5))])
+        conn.commit()
+    finally:
+        conn.close()
+
+def request_paths(days: int, rng: random.Random):
+    date = (datetime.now().date() - timedelta(days=rng.randrange(days))).strftime("%d-%m-%Y")
+    return rng.choice([
+        f'/activities?date={date}',
+        f'/habits?date={date}',
+        f'/todos?date={date}',
+        '/stats/heatmap',
+        '/stats/habits',
+        '/stats/activities',
+    ])
+
+def run_load(base_url: str, days: int, total: int, concurrency: int,
+             conditional: bool, seed: int = 0):
+    """Issue requests and return (latencies in seconds, status counts, elapsed seconds)."""
+    etags = {}
+    etags_lock = threading.Lock()
+    statuses = {}
+    statuses_lock = threading.Lock()
+
+    def one_request(i):
+        rng = random.Random(seed + i)
+        path = request_paths(days, rng)
+        request = Request(base_url + path)
+        if conditional:
+            with etags_lock:
+                etag = etags.get(path)
+            if etag:
+                request.add_header('If-None-Match', etag)
+
+        start = time.perf_counter()
+        try:
+            with urlopen(request) as response:
+                response.read()
+                status = response.status
+                etag = response.headers.get('ETag')
+        except HTTPError as e:
+            status, etag = e.code, e.headers.get('ETag')
+        latency = time.perf_counter() - start
+
+        if etag:
+            with etags_lock:
+                etags[path] = etag
+        with statuses_lock:
+            statuses[status] = statuses.get(status, 0) + 1
+        return latency
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = list(executor.map(one_request, range(total)))
+    return latencies, statuses, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--days', type=int, default=365, help="days of synthetic data")
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--pool-size', type=int, default=4)
+    parser.add_argument('--no-conditional', action='store_true',
+                        help="do not send If-None-Match (measure uncached responses)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'loadtest.db')
+        build_dataset(db_path, args.days)
+
+        server = serve('127.0.0.1', 0, db_path, args.pool_size)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            base_url = f'http://127.0.0.1:{server.server_port}'
+            latencies, statuses, elapsed = run_load(
+                base_url, args.days, args.requests, args.concurrency, not args.no_conditional)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    print(f"{len(latencies)} requests in {elapsed:.2f}s ({len(latencies) / elapsed:.1f} req/s)")
+    print(f"latency p50 {percentile(latencies, 50) * 1000:.2f} ms, "
+          f"p99 {percentile(latencies, 99) * 1000:.2f} ms")
+    print("status codes: " + ', '.join(f"{code}: {count}" for code, count in sorted(statuses.items())))
+
+if __name__ == '__main__':
+    main()
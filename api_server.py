@@ -0,0 +1,299 @@
+import argparse
+import json
+import re
+import threading
+import traceback
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from database import (
+    DB_PATH, use_database, initialize_database, enable_connection_pool, get_data_version,
+    add_activity, get_activities_by_date, create_habit_table, add_habit_status, load_day,
+    add_task, update_task_status, update_task_text, delete_task,
+    get_daily_habit_counts, get_habit_completion_counts, get_activity_counts, _sanitize_habit_name
+)
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+MAX_CACHED_RESPONSES = 256
+
+# Activity codes from the ActivityTracker legend; '' clears an hour
+ACTIVITY_CODES = {str(code) for code in range(1, 12)}
+
+class APIError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+def _today() -> str:
+    return datetime.now().strftime("%d-%m-%Y")
+
+def _recent_dates(days: int):
+    end_date = datetime.now().date()
+    return [(end_date - timedelta(days=i)).strftime("%d-%m-%Y") for i in range(days)]
+
+def _param(query: dict, name: str, default=None):
+    values = query.get(name)
+    return values[0] if values else default
+
+def _int_param(query: dict, name: str, default: int) -> int:
+    try:
+        return int(_param(query, name, default))
+    except ValueError:
+        raise APIError(400, f"'{name}' must be an integer")
+
+def _require(body: dict, *fields):
+    missing = [field for field in fields if field not in body]
+    if missing:
+        raise APIError(400, f"missing field(s): {', '.join(missing)}")
+    return [body[field] for field in fields]
+
+# Validation of written values; anything else would break load_day or analytics later
+def _valid_date(value, name: str = 'date') -> str:
+    try:
+        if datetime.strptime(value, "%d-%m-%Y").strftime("%d-%m-%Y") == value:
+            return value
+    except (TypeError, ValueError):
+        pass
+    raise APIError(400, f"'{name}' must be a DD-MM-YYYY date")
+
+def _valid_hour(value) -> str:
+    try:
+        hour = int(value)
+    except (TypeError, ValueError):
+        hour = None
+    if isinstance(value, bool) or hour is None or not 0 <= hour <= 23:
+        raise APIError(400, "'hour' must be an integer from 0 to 23")
+    return str(hour)
+
+def _valid_activity(value) -> str:
+    if value not in ACTIVITY_CODES and value != '':
+        codes = ', '.join(sorted(ACTIVITY_CODES, key=int))
+        raise APIError(400, f"'activity' must be one of {codes} or ''")
+    return value
+
+def _valid_habit(value) -> str:
+    if not isinstance(value, str) or not _sanitize_habit_name(value):
+        raise APIError(400, "'habit' must contain letters, digits or underscores")
+    return value
+
+def _valid_task(value) -> str:
+    if not isinstance(value, str) or not value.strip():
+        raise APIError(400, "'task' must be a non-empty string")
+    return value.strip()
+
+# GET handlers: (query) -> JSON-serializable result
+def get_activities(query):
+    date = _valid_date(_param(query, 'date', _today()))
+    return {'date': date, 'activities': dict(get_activities_by_date(date))}
+
+def get_habits(query):
+    date = _valid_date(_param(query, 'date', _today()))
+    return {'date': date, 'habits': load_day(date).habits}
+
+def get_todos(query):
+    date = _valid_date(_param(query, 'date', _today()))
+    snapshot = load_day(date)
+    completed, total = snapshot.task_stats
+    tasks = [{'id': task_id, 'task': task, 'completed': done}
+             for task_id, _, task, done in snapshot.tasks]
+    return {'date': date, 'tasks': tasks, 'completed': completed, 'total': total}
+
+def get_heatmap_stats(query):
+    counts = get_daily_habit_counts(_recent_dates(_int_param(query, 'days', 365)))
+    return {date: {'completed': completed, 'total': total}
+            for date, (completed, total) in counts.items()}
+
+def get_habit_stats(query):
+    counts = get_habit_completion_counts(_recent_dates(_int_param(query, 'days', 30)))
+    return {habit: {'completed': completed, 'tracked': tracked}
+            for habit, (completed, tracked) in counts.items()}
+
+def get_activity_stats(query):
+    return get_activity_counts(_recent_dates(_int_param(query, 'days', 30)))
+
+GET_ROUTES = {
+    '/activities': get_activities,
+    '/habits': get_habits,
+    '/todos': get_todos,
+    '/stats/heatmap': get_heatmap_stats,
+    '/stats/habits': get_habit_stats,
+    '/stats/activities': get_activity_stats,
+}
+
+TODO_ITEM = re.compile(r'^/todos/(\d+)$')
+
+class TrackerAPIServer(ThreadingHTTPServer):
+    """Threaded HTTP server with a response cache keyed on the data version."""
+
+    daemon_threads = True
+
+    def __init__(self, address, db_path: str = DB_PATH, pool_size: int = 4):
+        self.db_path = db_path
+        with use_database(db_path):
+            initialize_database()
+            enable_connection_pool(pool_size)
+        self._cache = {}
+        self._cache_lock = threading.Lock()
+        super().__init__(address, TrackerRequestHandler)
+
+    def cached(self, key: str, version: str):
+        with self._cache_lock:
+            entry = self._cache.get(key)
+        if entry and entry[0] == version:
+            return entry[1]
+        return None
+
+    def store(self, key: str, version: str, body: bytes) -> None:
+        with self._cache_lock:
+            if len(self._cache) >= MAX_CACHED_RESPONSES:
+                self._cache.clear()
+            self._cache[key] = (version, body)
+
+class TrackerRequestHandler(BaseHTTPRequestHandler):
+    server_version = 'LifetrackAPI/1.0'
+
+    def log_request(self, code='-', size='-'):
+        # Keep the console quiet under polling; log_error still reports errors
+        pass
+
+    def _send_json(self, status: int, payload=None, body: bytes = None, etag: str = None):
+        if body is None and payload is not None:
+            body = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        self.send_response(status)
+        if etag:
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', 'no-cache')
+        if body is not None:
+            self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body) if body else 0))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def _read_body(self) -> dict:
+        length = int(self.headers.get('Content-Length') or 0)
+        if not length:
+            return {}
+        try:
+            body = json.loads(self.rfile.read(length))
+        except ValueError:
+            raise APIError(400, "request body must be JSON")
+        if not isinstance(body, dict):
+            raise APIError(400, "request body must be a JSON object")
+        return body
+
+    def _handle(self, method):
+        try:
+            with use_database(self.server.db_path):
+                method()
+        except APIError as e:
+            self._send_json(e.status, {'error': str(e)})
+        except Exception as e:
+            self.log_error("%s %s failed: %r", self.command, self.path, e)
+            traceback.print_exc()
+            self._send_json(500, {'error': str(e)})
+
+    def do_GET(self):
+        self._handle(self._get)
+
+    def do_POST(self):
+        self._handle(self._post)
+
+    def do_PATCH(self):
+        self._handle(self._patch)
+
+    def do_DELETE(self):
+        self._handle(self._delete)
+
+    def _get(self):
+        url = urlparse(self.path)
+        route = GET_ROUTES.get(url.path.rstrip('/') or '/')
+        if route is None:
+            raise APIError(404, f"unknown resource {url.path}")
+
+        # Unchanged data costs one version lookup and no data queries.
+        # Day-relative endpoints change at midnight too, so the date is part of the tag.
+        version = f'{get_data_version()}-{_today()}'
+        etag = f'"{version}"'
+        if self.headers.get('If-None-Match') == etag:
+            self._send_json(304, etag=etag)
+            return
+
+        body = self.server.cached(self.path, version)
+        if body is None:
+            result = route(parse_qs(url.query))
+            body = json.dumps(result, separators=(',', ':')).encode('utf-8')
+            self.server.store(self.path, version, body)
+        self._send_json(200, body=body, etag=etag)
+
+    def _post(self):
+        path = urlparse(self.path).path.rstrip('/')
+        body = self._read_body()
+        if path == '/activities':
+            date, hour, activity = _require(body, 'date', 'hour', 'activity')
+            add_activity(_valid_date(date), _valid_hour(hour), _valid_activity(activity))
+            self._send_json(200, {'ok': True})
+        elif path == '/habits':
+            habit, date, completed = _require(body, 'habit', 'date', 'completed')
+            habit, date = _valid_habit(habit), _valid_date(date)
+            create_habit_table(habit)
+            add_habit_status(habit, date, bool(completed))
+            self._send_json(200, {'ok': True})
+        elif path == '/todos':
+            date, task = _require(body, 'date', 'task')
+            task_id = add_task(_valid_date(date), _valid_task(task), bool(body.get('completed', False)))
+            self._send_json(201, {'id': task_id})
+        else:
+            raise APIError(404, f"unknown resource {path}")
+
+    def _patch(self):
+        match = TODO_ITEM.match(urlparse(self.path).path)
+        if not match:
+            raise APIError(404, "only /todos/<id> can be updated")
+        task_id = int(match.group(1))
+        body = self._read_body()
+        text = _valid_task(body['task']) if 'task' in body else None
+        found = True
+        if 'completed' in body:
+            found = update_task_status(task_id, bool(body['completed']))
+        if found and text is not None:
+            found = update_task_text(task_id, text)
+        if not found:
+            raise APIError(404, f"no task with id {task_id}")
+        self._send_json(200, {'ok': True})
+
+    def _delete(self):
+        match = TODO_ITEM.match(urlparse(self.path).path)
+        if not match:
+            raise APIError(404, "only /todos/<id> can be deleted")
+        task_id = int(match.group(1))
+        if not delete_task(task_id):
+            raise APIError(404, f"no task with id {task_id}")
+        self._send_json(200, {'ok': True})
+
+def serve(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, db_path: str = DB_PATH,
+          pool_size: int = 4) -> TrackerAPIServer:
+    """Create the API server (call serve_forever() on the result to run it)."""
+    return TrackerAPIServer((host, port), db_path, pool_size)
+
+def main():
+    parser = argparse.ArgumentParser(description="Local JSON API over the lifetrack database.")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--db', default=DB_PATH, help="database file (default: %(default)s)")
+    parser.add_argument('--pool-size', type=int, default=4, help="pooled database connections")
+    args = parser.parse_args()
+
+    server = serve(args.host, args.port, args.db, args.pool_size)
+    print(f"Serving {args.db} on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == '__main__':
+    main()
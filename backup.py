@@ -0,0 +1,233 @@
+import argparse
+import gzip
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Callable, List, Optional
+
+from database import DB_DIR, get_db_path
+
+# Backup configuration
+BACKUP_DIR = os.path.join(DB_DIR, 'backups')
+
+class BackupError(Exception):
+    pass
+
+class _BackupRestarted(Exception):
+    """Raised from the progress callback when a write restarted the backup."""
+
+def check_integrity(db_path: str, compressed: Optional[bool] = None) -> bool:
+    """Run PRAGMA integrity_check on a database (or gzipped snapshot) file.
+    
+    compressed defaults to whether the name ends in .gz.
+    """
+    if compressed is None:
+        compressed = db_path.endswith('.gz')
+    if compressed:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            plain_path = os.path.join(tmp_dir, 'snapshot.db')
+            try:
+                with gzip.open(db_path, 'rb') as src, open(plain_path, 'wb') as dst:
+                    shutil.copyfileobj(src, dst)
+            except (EOFError, gzip.BadGzipFile):
+                return False
+            return check_integrity(plain_path)
+    
+    conn = sqlite3.connect(f'file:{db_path}?mode=ro', uri=True)
+    try:
+        return conn.execute('PRAGMA integrity_check').fetchone()[0] == 'ok'
+    except sqlite3.DatabaseError:
+        return False
+    finally:
+        conn.close()
+
+class BackupManager:
+    """Online backups of a database file with rotation.
+
+    Snapshots are copied with sqlite3's backup API, pages_per_step pages at
+    a time with step_pause seconds between steps, so the app can keep
+    reading and writing meanwhile. Every snapshot is integrity checked,
+    optionally gzipped, and only the newest `keep` are kept.
+    
+    A write from another connection restarts an SQLite backup from the
+    first page. When that happens the copy backs off and starts again with
+    larger steps (still bounded, so no step holds the source for long);
+    after max_restarts it gives up with BackupError and the next scheduled
+    run tries again.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, backup_dir: str = BACKUP_DIR,
+                 keep: int = 7, compress: bool = True, pages_per_step: int = 256,
+                 step_pause: float = 0.01, max_restarts: int = 5,
+                 max_pages_per_step: int = 4096, max_backoff: float = 2.0):
+        self.db_path = db_path or get_db_path()
+        self.backup_dir = backup_dir
+        self.keep = keep
+        self.compress = compress
+        self.pages_per_step = pages_per_step
+        self.step_pause = step_pause
+        self.max_restarts = max_restarts
+        self.max_pages_per_step = max(max_pages_per_step, pages_per_step)
+        self.max_backoff = max_backoff
+        self.prefix = os.path.splitext(os.path.basename(self.db_path))[0] + '-'
+        self._running = threading.Lock()
+        self._after_id = None
+
+    def list_snapshots(self) -> List[str]:
+        """Get finished snapshot files, oldest first."""
+        if not os.path.isdir(self.backup_dir):
+            return []
+        names = sorted(name for name in os.listdir(self.backup_dir)
+                       if name.startswith(self.prefix) and name.endswith(('.db', '.db.gz')))
+        return [os.path.join(self.backup_dir, name) for name in names]
+
+    def backup_now(self) -> str:
+        """Take a snapshot in the calling thread. Returns the snapshot path."""
+        os.makedirs(self.backup_dir, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+        snapshot_path = os.path.join(self.backup_dir, f'{self.prefix}{stamp}.db')
+        partial_path = snapshot_path + '.partial'
+        compressed_partial_path = snapshot_path + '.gz.partial'
+
+        # Snapshots only get their final name once complete and checked,
+        # so list_snapshots() and rotate() never count a truncated one
+        try:
+            self._copy_in_steps(partial_path)
+            if not check_integrity(partial_path):
+                raise BackupError(f"Snapshot of {self.db_path} failed the integrity check")
+            if self.compress:
+                with open(partial_path, 'rb') as src_file, \
+                        gzip.open(compressed_partial_path, 'wb') as dst_file:
+                    shutil.copyfileobj(src_file, dst_file)
+                if not check_integrity(compressed_partial_path, compressed=True):
+                    raise BackupError(f"Compressed snapshot of {self.db_path} failed the integrity check")
+                snapshot_path += '.gz'
+                os.replace(compressed_partial_path, snapshot_path)
+            else:
+                os.replace(partial_path, snapshot_path)
+        finally:
+            for path in (partial_path, compressed_partial_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+        self.rotate()
+        return snapshot_path
+
+    def _copy_in_steps(self, dst_path: str) -> None:
+        """Copy the database to dst_path in bounded steps, restarting with backoff."""
+        pages = self.pages_per_step
+        for attempt in range(self.max_restarts + 1):
+            if attempt:
+                # Let the burst of writes that restarted the copy pass, then use fewer, larger steps
+                time.sleep(min(self.step_pause * 2 ** attempt, self.max_backoff))
+                pages = min(pages * 2, self.max_pages_per_step)
+            
+            progress = {'remaining': None}
+
+            def pause_between_steps(status, remaining, total):
+                previous = progress['remaining']
+                progress['remaining'] = remaining
+                if previous is not None and remaining > previous:
+                    raise _BackupRestarted()
+                if remaining and self.step_pause:
+                    time.sleep(self.step_pause)
+            
+            src = sqlite3.connect(self.db_path)
+            dst = sqlite3.connect(dst_path)
+            try:
+                src.backup(dst, pages=pages, progress=pause_between_steps)
+                return
+            except _BackupRestarted:
+                continue
+            finally:
+                dst.close()
+                src.close()
+        raise BackupError(f"{self.db_path} kept changing; backup restarted "
+                          f"{self.max_restarts} times, will retry on the next run")
+
+    def rotate(self) -> List[str]:
+        """Delete all but the newest `keep` snapshots. Returns the deleted paths."""
+        snapshots = self.list_snapshots()
+        expired = snapshots[:max(0, len(snapshots) - self.keep)]
+        for path in expired:
+            os.remove(path)
+        return expired
+
+    def start(self, on_done: Optional[Callable[[Optional[str], Optional[Exception]], None]] = None
+              ) -> Optional[threading.Thread]:
+        """Take a snapshot in a background thread.
+
+        on_done(path, error) is called from that thread when it finishes.
+        Returns None if a backup is already running.
+        """
+        if not self._running.acquire(blocking=False):
+            return None
+
+        def run():
+            path, error = None, None
+            try:
+                path = self.backup_now()
+            except (sqlite3.Error, OSError, BackupError) as e:
+                print(f"Backup error: {e}")
+                error = e
+            finally:
+                self._running.release()
+            if on_done:
+                on_done(path, error)
+
+        thread = threading.Thread(target=run, name='lifetrack-backup', daemon=True)
+        thread.start()
+        return thread
+
+    def schedule(self, root, interval_ms: int,
+                 on_done: Optional[Callable[[Optional[str], Optional[Exception]], None]] = None,
+                 poll_ms: int = 200) -> None:
+        """Take a backup every interval_ms using Tk after(), without blocking the main loop.
+
+        on_done(path, error) is called on the Tk main loop.
+        """
+        results = []
+
+        def poll(thread):
+            if thread.is_alive():
+                root.after(poll_ms, poll, thread)
+            elif on_done and results:
+                on_done(*results.pop())
+
+        def tick():
+            thread = self.start(lambda path, error: results.append((path, error)))
+            if thread is not None:
+                root.after(poll_ms, poll, thread)
+            self._after_id = root.after(interval_ms, tick)
+
+        self._after_id = root.after(interval_ms, tick)
+
+    def cancel(self, root) -> None:
+        """Stop a schedule() started on root."""
+        if self._after_id is not None:
+            root.after_cancel(self._after_id)
+            self._after_id = None
+
+def main():
+    parser = argparse.ArgumentParser(description="Take an online backup of the lifetrack database.")
+    parser.add_argument('--db', default=get_db_path(), help="database file (default: %(default)s)")
+    parser.add_argument('--dir', default=BACKUP_DIR, help="backup directory (default: %(default)s)")
+    parser.add_argument('--keep', type=int, default=7, help="snapshots to keep")
+    parser.add_argument('--no-compress', action='store_true', help="do not gzip snapshots")
+    parser.add_argument('--verify', action='store_true',
+                        help="integrity check existing snapshots instead of taking one")
+    args = parser.parse_args()
+
+    manager = BackupManager(args.db, args.dir, args.keep, not args.no_compress)
+    if args.verify:
+        for path in manager.list_snapshots():
+            print(f"{'ok    ' if check_integrity(path) else 'FAILED'} {path}")
+        return
+    print(f"Snapshot written to {manager.backup_now()}")
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,15 @@
 import sqlite3
 import os
+import json
+import queue
+import threading
+import time
+import uuid
+from array import array
 from contextlib import contextmanager
-from typing import List, Tuple, Optional, Union
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Tuple, Optional, Union
 
 # Database configuration
 DB_DIR = os.path.join(os.path.dirname(__file__), '../data')
@@ -10,12 +18,69 @@ DB_PATH = os.path.join(DB_DIR, 'data.db')
 # Ensure data directory exists
 os.makedirs(DB_DIR, exist_ok=True)
 
+# Database file used by the functions below; profiles switch it per thread/context
+_active_db_path: ContextVar[Optional[str]] = ContextVar('active_db_path', default=None)
+
+def get_db_path() -> str:
+    """Get the database file used in the current context."""
+    return _active_db_path.get() or DB_PATH
+
 @contextmanager
-def get_db_connection():
+def use_database(db_path: str):
+    """Route all database functions in the current context to another database file."""
+    token = _active_db_path.set(db_path)
+    try:
+        yield
+    finally:
+        _active_db_path.reset(token)
+
+class ConnectionPool:
+    """Fixed-size pool of connections to one database file, shareable across threads."""
+
+    def __init__(self, db_path: str, size: int = 4):
+        self.db_path = db_path
+        self._connections = queue.Queue()
+        for _ in range(size):
+            self._connections.put(sqlite3.connect(db_path, check_same_thread=False))
+
+    def acquire(self) -> sqlite3.Connection:
+        """Take a connection, waiting until one is free."""
+        return self._connections.get()
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        """Return a connection, discarding any uncommitted work."""
+        if conn.in_transaction:
+            conn.rollback()
+        self._connections.put(conn)
+
+    def close(self) -> None:
+        while not self._connections.empty():
+            self._connections.get_nowait().close()
+
+# Pools by database file; get_db_connection borrows from these when present
+_pools: Dict[str, ConnectionPool] = {}
+
+def enable_connection_pool(size: int = 4, db_path: Optional[str] = None) -> ConnectionPool:
+    """Serve connections to a database file from a pool instead of reconnecting."""
+    db_path = db_path or get_db_path()
+    if db_path not in _pools:
+        _pools[db_path] = ConnectionPool(db_path, size)
+    return _pools[db_path]
+
+def disable_connection_pool(db_path: Optional[str] = None) -> None:
+    """Close a database file's pool and go back to one connection per call."""
+    pool = _pools.pop(db_path or get_db_path(), None)
+    if pool:
+        pool.close()
+
+@contextmanager
+def get_db_connection(db_path: Optional[str] = None):
     """Context manager for database connections with proper error handling."""
+    db_path = db_path or get_db_path()
+    pool = _pools.get(db_path)
     conn = None
     try:
-        conn = sqlite3.connect(DB_PATH)
+        conn = pool.acquire() if pool else sqlite3.connect(db_path)
         yield conn
     except sqlite3.Error as e:
         print(f"Database error: {e}")
@@ -24,13 +89,22 @@ def get_db_connection():
         raise
     finally:
         if conn:
-            conn.close()
+            if pool:
+                pool.release(conn)
+            else:
+                conn.close()
 
 def initialize_database():
     """Initialize all required database tables."""
     with get_db_connection() as conn:
         cursor = conn.cursor()
-        
+
+        # New files reclaim free pages incrementally (see reclaim_free_pages);
+        # auto_vacuum can only be switched this way before any table exists
+        cursor.execute("SELECT COUNT(*) FROM sqlite_master")
+        if cursor.fetchone()[0] == 0:
+            cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+
         # Activities table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS activities (
@@ -49,10 +123,11 @@ def initialize_database():
                 date TEXT NOT NULL,
                 task TEXT NOT NULL,
                 completed BOOLEAN NOT NULL DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                uid TEXT
             )
         ''')
-        
+
         # Check if created_at column exists, if not add it
         cursor.execute("PRAGMA table_info(todo)")
         columns = [column[1] for column in cursor.fetchall()]
@@ -70,19 +145,215 @@ def initialize_database():
                 SET created_at = datetime('now') 
                 WHERE created_at IS NULL
             ''')
+
+        # Tasks need an id that is stable across machines for sync
+        if 'uid' not in columns:
+            cursor.execute('ALTER TABLE todo ADD COLUMN uid TEXT')
+        # Derived from the row, so copies of one file upgraded separately agree on it
+        cursor.execute('SELECT id, date, task FROM todo WHERE uid IS NULL')
+        for task_id, date, task in cursor.fetchall():
+            cursor.execute('UPDATE todo SET uid = ? WHERE id = ?',
+                           (_baseline_task_uid(task_id, date, task), task_id))
+        cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_todo_uid ON todo(uid)')
+
+        # Key/value settings, including this database's replica id
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            )
+        ''')
+        cursor.execute('''
+            INSERT OR IGNORE INTO meta (key, value) VALUES ('replica_id', ?)
+        ''', (uuid.uuid4().hex,))
+
+        # Change log: one row per write, replayed by sync.py
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'change_log'")
+        has_change_log = cursor.fetchone() is not None
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS change_log (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                table_name TEXT NOT NULL,
+                row_key TEXT NOT NULL,
+                op TEXT NOT NULL,
+                payload TEXT,
+                changed_at REAL NOT NULL,
+                origin TEXT NOT NULL
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_change_log_key
+            ON change_log(table_name, row_key)
+        ''')
+
+        # Habit registry: every habit and the date it is tracked since
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS tracked_habits (
+                name TEXT PRIMARY KEY,
+                tracked_since TEXT NOT NULL
+            )
+        ''')
+        cursor.execute("SELECT 1 FROM meta WHERE key = 'sparse_habits'")
+        if cursor.fetchone() is None:
+            _migrate_to_sparse_habits(cursor)
+        if not has_change_log:
+            _log_baseline(cursor)
+        
+        # Last change log sequence number pulled from each sync peer
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS sync_state (
+                peer_id TEXT PRIMARY KEY,
+                last_seq INTEGER NOT NULL
+            )
+        ''')
         
         conn.commit()
 
+# Change log
+def get_replica_id(cursor: sqlite3.Cursor) -> str:
+    """Get the id identifying this database file as a sync replica."""
+    cursor.execute("SELECT value FROM meta WHERE key = 'replica_id'")
+    return cursor.fetchone()[0]
+
+def _baseline_task_uid(task_id: int, date: str, task: str) -> str:
+    return uuid.uuid5(uuid.NAMESPACE_OID, f'lifetrack-task|{task_id}|{date}|{task}').hex
+
+def _log_baseline(cursor: sqlite3.Cursor) -> None:
+    """Log every row that predates the change log, so sync exchanges it too.
+    
+    Entries are stamped changed_at 0, so any real edit wins over them and
+    replicas that disagree on a row settle on the same version.
+    """
+    origin = get_replica_id(cursor)
+    cursor.execute('SELECT date, hour, activity FROM activities')
+    for date, hour, activity in cursor.fetchall():
+        log_change(cursor, 'activities', f'{date}|{hour}', 'upsert',
+                   {'activity': activity}, 0.0, origin)
+    
+    cursor.execute('SELECT name FROM tracked_habits ORDER BY rowid')
+    for (habit,) in cursor.fetchall():
+        cursor.execute(f'SELECT date FROM habit_{habit} WHERE completed')
+        for (date,) in cursor.fetchall():
+            log_change(cursor, 'habits', f'{habit}|{date}', 'upsert', {'completed': True}, 0.0, origin)
+    
+    cursor.execute('SELECT uid, date, task, completed, created_at FROM todo')
+    for uid, date, task, completed, created_at in cursor.fetchall():
+        log_change(cursor, 'todo', uid, 'upsert', {
+            'date': date, 'task': task, 'completed': bool(completed), 'created_at': created_at
+        }, 0.0, origin)
+
+def get_latest_change(cursor: sqlite3.Cursor, table: str, row_key: str) -> Optional[Tuple[float, str]]:
+    """Get (changed_at, origin) of the winning change for a row, if any."""
+    cursor.execute('''
+        SELECT changed_at, origin FROM change_log
+        WHERE table_name = ? AND row_key = ?
+        ORDER BY changed_at DESC, origin DESC
+        LIMIT 1
+    ''', (table, row_key))
+    return cursor.fetchone()
+
+# meta counters for writes that are not in the change log
+_VERSION_COUNTERS = ('archive_version', 'habit_version')
+
+def get_data_version() -> int:
+    """Get a counter that increases with every write, logged or not.
+    
+    It is the last change log seq plus the counters kept in meta for
+    writes that are not logged: archived batches and newly registered habits.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            SELECT (SELECT COALESCE(MAX(seq), 0) FROM change_log)
+                 + (SELECT COALESCE(SUM(CAST(value AS INTEGER)), 0) FROM meta
+                    WHERE key IN ({','.join('?' * len(_VERSION_COUNTERS))}))
+        ''', _VERSION_COUNTERS)
+        return cursor.fetchone()[0]
+
+def _bump_version(cursor: sqlite3.Cursor, counter: str) -> None:
+    """Count an unlogged write towards get_data_version, inside the caller's transaction."""
+    cursor.execute('''
+        INSERT INTO meta (key, value) VALUES (?, '1')
+        ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1
+    ''', (counter,))
+
+def log_change(cursor: sqlite3.Cursor, table: str, row_key: str, op: str,
+               payload: Optional[dict] = None, changed_at: Optional[float] = None,
+               origin: Optional[str] = None) -> None:
+    """Append a write to the change log, inside the caller's transaction.
+    
+    Local writes (no changed_at/origin) are stamped so they always win
+    last-writer-wins against changes already seen for the same row, even
+    when the local clock is behind a peer's.
+    """
+    if origin is None:
+        origin = get_replica_id(cursor)
+    if changed_at is None:
+        changed_at = time.time()
+        latest = get_latest_change(cursor, table, row_key)
+        if latest and latest[0] >= changed_at:
+            changed_at = latest[0] + 1e-6
+    
+    cursor.execute('''
+        INSERT INTO change_log (table_name, row_key, op, payload, changed_at, origin)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', (table, row_key, op,
+          json.dumps(payload, separators=(',', ':')) if payload is not None else None,
+          changed_at, origin))
+
+def _log_task(cursor: sqlite3.Cursor, task_id: int) -> Optional[str]:
+    """Log the current state of a task row. Returns the task's date."""
+    cursor.execute('''
+        SELECT uid, date, task, completed, created_at FROM todo WHERE id = ?
+    ''', (task_id,))
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    uid, date, task, completed, created_at = row
+    log_change(cursor, 'todo', uid, 'upsert', {
+        'date': date, 'task': task, 'completed': bool(completed), 'created_at': created_at
+    })
+    return date
+
+# Change listeners: called as listener(db_path, table, date) after a write commits.
+# date is None when the change is not tied to one day (e.g. a new habit).
+_change_listeners: List[Callable[[str, str, Optional[str]], None]] = []
+
+def add_change_listener(listener: Callable[[str, str, Optional[str]], None]) -> None:
+    """Get notified after every committed write."""
+    _change_listeners.append(listener)
+
+def remove_change_listener(listener: Callable[[str, str, Optional[str]], None]) -> None:
+    if listener in _change_listeners:
+        _change_listeners.remove(listener)
+
+def _notify_change(table: str, date: Optional[str]) -> None:
+    db_path = get_db_path()
+    for listener in list(_change_listeners):
+        listener(db_path, table, date)
+
 # Activities functions
-def add_activity(date: str, hour: str, activity: str) -> None:
-    """Add or update an activity for a specific date and hour."""
+def add_activity(date: str, hour: str, activity: str) -> bool:
+    """Add or update an activity for a specific date and hour.
+    
+    Returns False, without writing, logging or notifying, when the hour
+    already holds that activity (or is empty and activity is '').
+    """
     with get_db_connection() as conn:
         cursor = conn.cursor()
+        cursor.execute('SELECT activity FROM activities WHERE date = ? AND hour = ?', (date, hour))
+        row = cursor.fetchone()
+        if (row[0] if row else '') == activity:
+            return False
+        
         cursor.execute('''
             INSERT OR REPLACE INTO activities (date, hour, activity)
             VALUES (?, ?, ?)
         ''', (date, hour, activity))
+        log_change(cursor, 'activities', f'{date}|{hour}', 'upsert', {'activity': activity})
         conn.commit()
+    _notify_change('activities', date)
+    return True
 
 def check_activity(date: str, hour: str) -> Optional[str]:
     """Get activity for a specific date and hour."""
@@ -96,49 +367,164 @@ def check_activity(date: str, hour: str) -> Optional[str]:
         result = cursor.fetchone()
         return result[0] if result else None
 
-def get_activities_by_date(date: str) -> List[Tuple[str, str]]:
+def get_activities_by_date(date: str, include_archived: bool = False) -> List[Tuple[str, str]]:
     """Get all activities for a specific date."""
-    with get_db_connection() as conn:
+    with get_db_connection() as conn, _attached_archive(conn, include_archived) as archived:
         cursor = conn.cursor()
+        if archived:
+            cursor.execute('''
+                SELECT hour, activity FROM (
+                    SELECT hour, activity FROM activities WHERE date = ?
+                    UNION ALL
+                    SELECT hour, activity FROM archive.activities WHERE date = ?
+                )
+                ORDER BY CAST(hour AS INTEGER)
+            ''', (date, date))
+            return cursor.fetchall()
+        
         cursor.execute('''
-            SELECT hour, activity FROM activities 
-            WHERE date = ? 
+            SELECT hour, activity FROM activities
+            WHERE date = ?
             ORDER BY CAST(hour AS INTEGER)
         ''', (date,))
         
         return cursor.fetchall()
 
+def get_activity_counts(dates: Iterable[str]) -> Dict[str, int]:
+    """Count logged hours per activity code over the given dates."""
+    dates = list(dates)
+    counts = {}
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        for chunk in _chunked(dates):
+            placeholders = ','.join('?' * len(chunk))
+            cursor.execute(f'''
+                SELECT activity, COUNT(*) FROM activities
+                WHERE date IN ({placeholders})
+                GROUP BY activity
+            ''', chunk)
+            for activity, count in cursor.fetchall():
+                counts[activity] = counts.get(activity, 0) + count
+        return counts
+
+def get_activity_log(dates: Iterable[str], include_archived: bool = False) -> List[Tuple[str, str, str]]:
+    """Get (date, hour, activity) for every logged hour on the given dates.
+    
+    Meant for long date ranges: each table is read once and filtered here,
+    which is far faster than IN lists over thousands of dates.
+    """
+    wanted = set(dates)
+    log = []
+    with get_db_connection() as conn, _attached_archive(conn, include_archived) as archived:
+        cursor = conn.cursor()
+        for table in ['activities'] + (['archive.activities'] if archived else []):
+            cursor.execute(f'SELECT date, hour, activity FROM {table}')
+            log.extend(row for row in cursor.fetchall() if row[0] in wanted)
+        return log
+
 # Habits functions
+# Habits are stored sparsely: a habit_<name> table only holds days the habit
+# was done, and tracked_habits records since when each habit counts.
 def _sanitize_habit_name(habit_name: str) -> str:
     """Sanitize habit name for safe use in SQL table names."""
     return ''.join(c for c in habit_name if c.isalnum() or c == '_')
 
-def create_habit_table(habit_name: str) -> None:
-    """Create a table for tracking a specific habit."""
+def _date_key(date: str) -> str:
+    """Turn a DD-MM-YYYY date into a sortable YYYY-MM-DD string."""
+    return f'{date[6:10]}-{date[3:5]}-{date[0:2]}'
+
+def _ensure_habit(cursor: sqlite3.Cursor, sanitized_name: str, tracked_since: str) -> None:
+    """Create a habit's table and register it, tracked from the given date."""
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS habit_{sanitized_name} (
+            date TEXT PRIMARY KEY,
+            completed BOOLEAN NOT NULL DEFAULT 0
+        )
+    ''')
+    cursor.execute('''
+        INSERT OR IGNORE INTO tracked_habits (name, tracked_since) VALUES (?, ?)
+    ''', (sanitized_name, tracked_since))
+    if cursor.rowcount:
+        _bump_version(cursor, 'habit_version')
+
+def _write_habit_status(cursor: sqlite3.Cursor, sanitized_name: str, date: str,
+                        completed: bool) -> None:
+    """Store a check-in (or remove it), extending tracked_since back to date if needed."""
+    _ensure_habit(cursor, sanitized_name, date)
+    if completed:
+        cursor.execute(f'''
+            INSERT OR REPLACE INTO habit_{sanitized_name} (date, completed)
+            VALUES (?, 1)
+        ''', (date,))
+    else:
+        cursor.execute(f'DELETE FROM habit_{sanitized_name} WHERE date = ?', (date,))
+    
+    cursor.execute('SELECT tracked_since FROM tracked_habits WHERE name = ?', (sanitized_name,))
+    if _date_key(date) < _date_key(cursor.fetchone()[0]):
+        cursor.execute('''
+            UPDATE tracked_habits SET tracked_since = ? WHERE name = ?
+        ''', (date, sanitized_name))
+
+def _migrate_to_sparse_habits(cursor: sqlite3.Cursor) -> None:
+    """Register existing habit tables and drop their placeholder rows.
+
+    Placeholders (completed = 0) used to be written for every day a habit was
+    shown, so the earliest row of any kind becomes the habit's tracked_since.
+    """
+    cursor.execute(r'''
+        SELECT name FROM sqlite_master
+        WHERE type='table' AND name LIKE 'habit\_%' ESCAPE '\'
+    ''')
+    for (table,) in cursor.fetchall():
+        cursor.execute(f'SELECT MIN({_ISO_DATE_SQL.format("date")}) FROM {table}')
+        earliest = cursor.fetchone()[0]
+        if earliest:
+            tracked_since = f'{earliest[8:10]}-{earliest[5:7]}-{earliest[0:4]}'
+        else:
+            tracked_since = datetime.now().strftime("%d-%m-%Y")
+        
+        cursor.execute('''
+            INSERT OR IGNORE INTO tracked_habits (name, tracked_since) VALUES (?, ?)
+        ''', (table[6:], tracked_since))
+        cursor.execute(f'DELETE FROM {table} WHERE completed = 0')
+    
+    cursor.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('sparse_habits', '1')")
+
+def create_habit_table(habit_name: str, tracked_since: Optional[str] = None) -> None:
+    """Create a table for tracking a specific habit, counted from tracked_since (default today)."""
     sanitized_name = _sanitize_habit_name(habit_name)
     with get_db_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute(f'''
-            CREATE TABLE IF NOT EXISTS habit_{sanitized_name} (
-                date TEXT PRIMARY KEY,
-                completed BOOLEAN NOT NULL DEFAULT 0
-            )
-        ''')
+        _ensure_habit(cursor, sanitized_name,
+                      tracked_since or datetime.now().strftime("%d-%m-%Y"))
         conn.commit()
+    _notify_change('habits', None)
 
-def add_habit_status(habit_name: str, date: str, completed: bool) -> None:
-    """Add or update habit status for a specific date."""
+def add_habit_status(habit_name: str, date: str, completed: bool) -> bool:
+    """Add or update habit status for a specific date.
+    
+    Returns False, without writing, logging or notifying, when nothing changes.
+    """
     sanitized_name = _sanitize_habit_name(habit_name)
     with get_db_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute(f'''
-            INSERT OR REPLACE INTO habit_{sanitized_name} (date, completed)
-            VALUES (?, ?)
-        ''', (date, completed))
+        cursor.execute('SELECT tracked_since FROM tracked_habits WHERE name = ?', (sanitized_name,))
+        row = cursor.fetchone()
+        if row and _date_key(row[0]) <= _date_key(date):
+            cursor.execute(f'SELECT 1 FROM habit_{sanitized_name} WHERE date = ? AND completed',
+                           (date,))
+            if (cursor.fetchone() is not None) == bool(completed):
+                return False
+        
+        _write_habit_status(cursor, sanitized_name, date, completed)
+        log_change(cursor, 'habits', f'{sanitized_name}|{date}', 'upsert',
+                   {'completed': bool(completed)})
         conn.commit()
+    _notify_change('habits', date)
+    return True
 
-def check_habit_status(habit_name: str, date: str) -> Optional[bool]:
-    """Get habit status for a specific date."""
+def check_habit_status(habit_name: str, date: str) -> bool:
+    """Get habit status for a specific date (no check-in means not done)."""
     sanitized_name = _sanitize_habit_name(habit_name)
     with get_db_connection() as conn:
         cursor = conn.cursor()
@@ -148,19 +534,21 @@ def check_habit_status(habit_name: str, date: str) -> Optional[bool]:
         ''', (date,))
         
         result = cursor.fetchone()
-        return bool(result[0]) if result is not None else None
+        return bool(result[0]) if result is not None else False
 
 def get_habit_names() -> List[str]:
-    """Get all habit names from existing habit tables."""
+    """Get all tracked habit names."""
     with get_db_connection() as conn:
         cursor = conn.cursor()
-        cursor.execute('''
-            SELECT name FROM sqlite_master 
-            WHERE type='table' AND name LIKE 'habit_%'
-        ''')
-        
-        tables = cursor.fetchall()
-        return [table[0][6:] for table in tables]  # Remove 'habit_' prefix
+        cursor.execute('SELECT name FROM tracked_habits ORDER BY rowid')
+        return [row[0] for row in cursor.fetchall()]
+
+def get_habit_tracked_since() -> Dict[str, str]:
+    """Get the date each habit has been tracked since."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT name, tracked_since FROM tracked_habits ORDER BY rowid')
+        return dict(cursor.fetchall())
 
 def get_habit_stats(habit_name: str, limit: int = 30) -> List[Tuple[str, bool]]:
     """Get recent habit completion statistics."""
@@ -175,6 +563,84 @@ def get_habit_stats(habit_name: str, limit: int = 30) -> List[Tuple[str, bool]]:
         
         return cursor.fetchall()
 
+def get_habit_statuses(habit_name: str, dates: Iterable[str],
+                       include_archived: bool = False) -> Dict[str, bool]:
+    """Get habit status for many dates at once (dates without a check-in are omitted)."""
+    sanitized_name = _sanitize_habit_name(habit_name)
+    dates = list(dates)
+    statuses = {}
+    with get_db_connection() as conn, _attached_archive(conn, include_archived) as archived:
+        cursor = conn.cursor()
+        for chunk in _chunked(dates):
+            placeholders = ','.join('?' * len(chunk))
+            if archived:
+                cursor.execute(f'''
+                    SELECT date, completed FROM archive.habits
+                    WHERE habit = ? AND date IN ({placeholders})
+                ''', [sanitized_name] + chunk)
+                statuses.update((date, bool(completed)) for date, completed in cursor.fetchall())
+            cursor.execute(f'''
+                SELECT date, completed FROM habit_{sanitized_name}
+                WHERE date IN ({placeholders})
+            ''', chunk)
+            statuses.update((date, bool(completed)) for date, completed in cursor.fetchall())
+        return statuses
+
+def get_daily_habit_counts(dates: Iterable[str], include_archived: bool = True) -> Dict[str, Tuple[int, int]]:
+    """Get (completed habits, habits tracked that day) per date, archived check-ins included."""
+    dates = list(dates)
+    tracked_since = {habit: _date_key(since) for habit, since in get_habit_tracked_since().items()}
+    completed = dict.fromkeys(dates, 0)
+    for habit in tracked_since:
+        for date, status in get_habit_statuses(habit, dates, include_archived).items():
+            if status:
+                completed[date] += 1
+    
+    counts = {}
+    for date in dates:
+        key = _date_key(date)
+        possible = sum(1 for since in tracked_since.values() if since <= key)
+        counts[date] = (completed[date], possible)
+    return counts
+
+def get_habit_completion_counts(dates: Iterable[str], include_archived: bool = True) -> Dict[str, Tuple[int, int]]:
+    """Get (completed days, tracked days) per habit over the given dates, archived check-ins included."""
+    dates = list(dates)
+    date_keys = [_date_key(date) for date in dates]
+    counts = {}
+    for habit, since in get_habit_tracked_since().items():
+        since_key = _date_key(since)
+        statuses = get_habit_statuses(habit, dates, include_archived)
+        tracked = sum(1 for key in date_keys if key >= since_key)
+        counts[habit] = (sum(statuses.values()), tracked)
+    return counts
+
+def get_habit_completions(dates: Iterable[str], include_archived: bool = False) -> Dict[str, List[str]]:
+    """Get which of the given dates each tracked habit was done on.
+    
+    Like get_activity_log, reads each table once and filters here.
+    """
+    wanted = set(dates)
+    with get_db_connection() as conn, _attached_archive(conn, include_archived) as archived:
+        cursor = conn.cursor()
+        cursor.execute('SELECT name FROM tracked_habits ORDER BY rowid')
+        completions = {name: [] for (name,) in cursor.fetchall()}
+        for habit, done in completions.items():
+            cursor.execute(f'SELECT date FROM habit_{habit} WHERE completed')
+            done.extend(date for (date,) in cursor.fetchall() if date in wanted)
+        
+        if archived:
+            cursor.execute('SELECT habit, date FROM archive.habits WHERE completed')
+            for habit, date in cursor.fetchall():
+                if habit in completions and date in wanted:
+                    completions[habit].append(date)
+        return completions
+
+def _chunked(values: List[str], size: int = 500) -> Iterable[List[str]]:
+    """Split a list into chunks that stay under SQLite's bound parameter limit."""
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
 # Todo functions
 def add_task(date: str, task: str, completed: bool = False) -> int:
     """Add a new task and return its ID."""
@@ -187,28 +653,40 @@ def add_task(date: str, task: str, completed: bool = False) -> int:
         
         if 'created_at' in columns:
             cursor.execute('''
-                INSERT INTO todo (date, task, completed, created_at)
-                VALUES (?, ?, ?, datetime('now'))
-            ''', (date, task, completed))
+                INSERT INTO todo (date, task, completed, created_at, uid)
+                VALUES (?, ?, ?, datetime('now'), ?)
+            ''', (date, task, completed, uuid.uuid4().hex))
         else:
             cursor.execute('''
-                INSERT INTO todo (date, task, completed)
-                VALUES (?, ?, ?)
-            ''', (date, task, completed))
-            
+                INSERT INTO todo (date, task, completed, uid)
+                VALUES (?, ?, ?, ?)
+            ''', (date, task, completed, uuid.uuid4().hex))
+        
+        task_id = cursor.lastrowid
+        _log_task(cursor, task_id)
         conn.commit()
-        return cursor.lastrowid
+    _notify_change('todo', date)
+    return task_id
 
-def get_tasks_by_date(date: str) -> List[Tuple[int, str, str, bool]]:
-    """Get all tasks for a specific date."""
-    with get_db_connection() as conn:
+def get_tasks_by_date(date: str, include_archived: bool = False) -> List[Tuple[int, str, str, bool]]:
+    """Get all tasks for a specific date (archived tasks are read-only)."""
+    with get_db_connection() as conn, _attached_archive(conn, include_archived) as archived:
         cursor = conn.cursor()
-        
+
         # Check if created_at column exists
         cursor.execute("PRAGMA table_info(todo)")
         columns = [column[1] for column in cursor.fetchall()]
         
-        if 'created_at' in columns:
+        if archived:
+            cursor.execute('''
+                SELECT id, date, task, completed FROM (
+                    SELECT id, date, task, completed, created_at FROM todo WHERE date = ?
+                    UNION ALL
+                    SELECT id, date, task, completed, created_at FROM archive.todo WHERE date = ?
+                )
+                ORDER BY created_at ASC
+            ''', (date, date))
+        elif 'created_at' in columns:
             cursor.execute('''
                 SELECT id, date, task, completed FROM todo 
                 WHERE date = ? 
@@ -223,30 +701,55 @@ def get_tasks_by_date(date: str) -> List[Tuple[int, str, str, bool]]:
         
         return cursor.fetchall()
 
-def update_task_status(task_id: int, completed: bool) -> None:
-    """Update the completion status of a task."""
+def update_task_status(task_id: int, completed: bool) -> bool:
+    """Update the completion status of a task. Returns False if there is no such task."""
     with get_db_connection() as conn:
         cursor = conn.cursor()
+        cursor.execute('SELECT completed FROM todo WHERE id = ?', (task_id,))
+        row = cursor.fetchone()
+        if row is None or bool(row[0]) == bool(completed):
+            return row is not None
+        
         cursor.execute('''
             UPDATE todo SET completed = ? WHERE id = ?
         ''', (completed, task_id))
+        date = _log_task(cursor, task_id)
         conn.commit()
+    if date is not None:
+        _notify_change('todo', date)
+    return date is not None
 
-def update_task_text(task_id: int, new_text: str) -> None:
-    """Update the text of a task."""
+def update_task_text(task_id: int, new_text: str) -> bool:
+    """Update the text of a task. Returns False if there is no such task."""
     with get_db_connection() as conn:
         cursor = conn.cursor()
+        cursor.execute('SELECT task FROM todo WHERE id = ?', (task_id,))
+        row = cursor.fetchone()
+        if row is None or row[0] == new_text:
+            return row is not None
+        
         cursor.execute('''
             UPDATE todo SET task = ? WHERE id = ?
         ''', (new_text, task_id))
+        date = _log_task(cursor, task_id)
         conn.commit()
+    if date is not None:
+        _notify_change('todo', date)
+    return date is not None
 
-def delete_task(task_id: int) -> None:
-    """Delete a task by its ID."""
+def delete_task(task_id: int) -> bool:
+    """Delete a task by its ID. Returns False if there is no such task."""
     with get_db_connection() as conn:
         cursor = conn.cursor()
+        cursor.execute('SELECT uid, date FROM todo WHERE id = ?', (task_id,))
+        row = cursor.fetchone()
         cursor.execute('DELETE FROM todo WHERE id = ?', (task_id,))
+        if row:
+            log_change(cursor, 'todo', row[0], 'delete')
         conn.commit()
+    if row:
+        _notify_change('todo', row[1])
+    return row is not None
 
 def get_task_stats(date: str) -> Tuple[int, int]:
     """Get task completion statistics for a date (completed, total)."""
@@ -263,16 +766,26 @@ def get_task_stats(date: str) -> Tuple[int, int]:
         result = cursor.fetchone()
         return (result[1] or 0, result[0] or 0)
 
-def get_all_tasks(limit: int = 100) -> List[Tuple[int, str, str, bool]]:
+def get_all_tasks(limit: int = 100, include_archived: bool = False) -> List[Tuple[int, str, str, bool]]:
     """Get all tasks with optional limit."""
-    with get_db_connection() as conn:
+    with get_db_connection() as conn, _attached_archive(conn, include_archived) as archived:
         cursor = conn.cursor()
-        
+
         # Check if created_at column exists
         cursor.execute("PRAGMA table_info(todo)")
         columns = [column[1] for column in cursor.fetchall()]
         
-        if 'created_at' in columns:
+        if archived:
+            cursor.execute('''
+                SELECT id, date, task, completed FROM (
+                    SELECT id, date, task, completed, created_at FROM todo
+                    UNION ALL
+                    SELECT id, date, task, completed, created_at FROM archive.todo
+                )
+                ORDER BY created_at DESC
+                LIMIT ?
+            ''', (limit,))
+        elif 'created_at' in columns:
             cursor.execute('''
                 SELECT id, date, task, completed FROM todo 
                 ORDER BY created_at DESC 
@@ -288,33 +801,304 @@ def get_all_tasks(limit: int = 100) -> List[Tuple[int, str, str, bool]]:
         return cursor.fetchall()
 
 def cleanup_old_tasks(days_old: int = 30) -> int:
-    """Delete tasks older than specified days. Returns number of deleted tasks."""
-    with get_db_connection() as conn:
-        cursor = conn.cursor()
+    """Move tasks older than specified days to the archive. Returns number of archived tasks."""
+    return archive_old_records(days_old)['todo']
+
+# Day snapshot
+class DaySnapshot:
+    """Immutable view of everything the trackers show for one date.
+
+    Activities are kept as 24 small integer codes (0 = nothing logged) and
+    habit statuses as a byte per habit, in the order of habit_names.
+    """
+    __slots__ = ('date', 'habit_names', 'tasks', 'task_stats',
+                 '_activity_codes', '_other_activities', '_habit_status', '_habit_index')
+
+    def __init__(self, date: str, activities: Iterable[Tuple[str, str]], habit_names: Iterable[str],
+                 completed_habits: Iterable[str], tasks: Iterable[Tuple[int, str, str, bool]]):
+        activity_codes = array('B', bytes(24))
+        other_activities = {}
+        for hour, activity in activities:
+            hour = int(hour)
+            if activity.isdigit() and 0 < int(activity) < 256:
+                activity_codes[hour] = int(activity)
+            elif activity:
+                other_activities[hour] = activity
         
-        # Check if created_at column exists
-        cursor.execute("PRAGMA table_info(todo)")
-        columns = [column[1] for column in cursor.fetchall()]
+        habit_names = tuple(habit_names)
+        completed_habits = set(completed_habits)
+        tasks = tuple((task_id, task_date, task, bool(completed))
+                      for task_id, task_date, task, completed in tasks)
         
-        if 'created_at' in columns:
-            cursor.execute('''
-                DELETE FROM todo 
-                WHERE created_at < datetime('now', '-' || ? || ' days')
-            ''', (days_old,))
-        else:
-            # If no created_at column, we can't delete by date
-            print("Warning: created_at column not found. Cannot delete old tasks.")
-            return 0
+        values = {
+            'date': date,
+            'habit_names': habit_names,
+            'tasks': tasks,
+            'task_stats': (sum(1 for task in tasks if task[3]), len(tasks)),
+            '_activity_codes': activity_codes,
+            '_other_activities': other_activities,
+            '_habit_status': array('B', (name in completed_habits for name in habit_names)),
+            '_habit_index': {name: i for i, name in enumerate(habit_names)},
+        }
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("DaySnapshot is immutable")
+
+    def __repr__(self):
+        return f'DaySnapshot({self.date!r})'
+
+    def activity(self, hour: int) -> Optional[str]:
+        """Get the activity code logged for an hour, or None."""
+        code = self._activity_codes[hour]
+        return str(code) if code else self._other_activities.get(hour)
+
+    @property
+    def activities(self) -> Dict[str, str]:
+        """Get logged activities as {hour: activity code}."""
+        return {str(hour): self.activity(hour) for hour in range(24) if self.activity(hour)}
+
+    def habit_status(self, habit_name: str) -> bool:
+        """Get whether a habit was done on this date."""
+        index = self._habit_index.get(_sanitize_habit_name(habit_name))
+        return index is not None and bool(self._habit_status[index])
+
+    @property
+    def habits(self) -> Dict[str, bool]:
+        """Get habit statuses as {habit: done}."""
+        return {name: bool(done) for name, done in zip(self.habit_names, self._habit_status)}
+
+def load_day(date: str) -> DaySnapshot:
+    """Read a date's activities, habit statuses and tasks in one read transaction.
+
+    Costs four queries regardless of the number of habits or hours.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('BEGIN')
+        try:
+            cursor.execute('SELECT hour, activity FROM activities WHERE date = ?', (date,))
+            activities = cursor.fetchall()
             
+            cursor.execute('SELECT name FROM tracked_habits ORDER BY rowid')
+            habit_names = [row[0] for row in cursor.fetchall()]
+            
+            # One compound query for all habit tables (SQLite allows 500 terms per compound)
+            completed_habits = []
+            for chunk in _chunked(habit_names, 500):
+                cursor.execute(' UNION ALL '.join(
+                    f"SELECT '{name}' FROM habit_{name} WHERE date = ? AND completed = 1"
+                    for name in chunk
+                ), [date] * len(chunk))
+                completed_habits += [row[0] for row in cursor.fetchall()]
+            
+            cursor.execute('''
+                SELECT id, date, task, completed FROM todo 
+                WHERE date = ? 
+                ORDER BY created_at ASC, id ASC
+            ''', (date,))
+            tasks = cursor.fetchall()
+        finally:
+            conn.commit()
+    
+    return DaySnapshot(date, activities, habit_names, completed_habits, tasks)
+
+# Archive
+# Dates are stored as DD-MM-YYYY; this turns a date column into a comparable YYYY-MM-DD
+_ISO_DATE_SQL = "substr({0}, 7, 4) || '-' || substr({0}, 4, 2) || '-' || substr({0}, 1, 2)"
+
+def get_archive_path(db_path: Optional[str] = None) -> str:
+    """Get the archive database file belonging to a database file."""
+    return os.path.splitext(db_path or get_db_path())[0] + '.archive.db'
+
+@contextmanager
+def _attached_archive(conn: sqlite3.Connection, enabled: bool = True, create: bool = False):
+    """Attach the archive database as 'archive' for the duration of the block.
+    
+    Yields False (and attaches nothing) when disabled or when no archive
+    exists yet and create is False.
+    """
+    if not enabled:
+        yield False
+        return
+    
+    cursor = conn.cursor()
+    cursor.execute('PRAGMA database_list')
+    main_path = next(row[2] for row in cursor.fetchall() if row[1] == 'main')
+    archive_path = get_archive_path(main_path or get_db_path())
+    if not (create or os.path.exists(archive_path)):
+        yield False
+        return
+    
+    cursor.execute('ATTACH DATABASE ? AS archive', (archive_path,))
+    try:
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS archive.todo (
+                id INTEGER PRIMARY KEY,
+                date TEXT NOT NULL,
+                task TEXT NOT NULL,
+                completed BOOLEAN NOT NULL DEFAULT 0,
+                created_at TIMESTAMP,
+                uid TEXT
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS archive.activities (
+                date TEXT NOT NULL,
+                hour TEXT NOT NULL,
+                activity TEXT NOT NULL,
+                PRIMARY KEY (date, hour)
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS archive.habits (
+                habit TEXT NOT NULL,
+                date TEXT NOT NULL,
+                completed BOOLEAN NOT NULL DEFAULT 0,
+                PRIMARY KEY (habit, date)
+            )
+        ''')
+        conn.commit()
+        yield True
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        cursor.execute('DETACH DATABASE archive')
+
+def _move_in_batches(conn: sqlite3.Connection, table: str, select_keys: str, copy: str,
+                     delete: str, params: tuple, batch_size: int, pause: float) -> int:
+    """Move rows to the archive one committed batch at a time. Returns rows moved.
+    
+    select_keys picks the next batch of rowids; copy and delete take those
+    rowids as an IN list. Every batch is its own transaction, so an
+    interrupted run loses nothing and the next run picks up where it stopped.
+    Each batch bumps the data version and notifies change listeners, so
+    caches stop serving the moved rows.
+    """
+    cursor = conn.cursor()
+    moved = 0
+    while True:
+        cursor.execute(select_keys, params + (batch_size,))
+        keys = [row[0] for row in cursor.fetchall()]
+        if not keys:
+            return moved
+        
+        placeholders = ','.join('?' * len(keys))
+        cursor.execute(copy.format(placeholders), keys)
+        cursor.execute(delete.format(placeholders), keys)
+        _bump_version(cursor, 'archive_version')
         conn.commit()
-        return cursor.rowcount
+        moved += len(keys)
+        _notify_change(table, None)
+
+        # Give other writers a chance to get the lock between batches
+        if pause:
+            time.sleep(pause)
+
+def archive_old_records(days_old: int = 30, include_activities: bool = False,
+                        include_habits: bool = False, batch_size: int = 500,
+                        pause: float = 0.01) -> Dict[str, int]:
+    """Move old rows into the archive database in bounded, resumable batches.
+    
+    Tasks are archived by creation time; activities and habit check-ins (both
+    opt-in) by their date. Archived rows stay readable through the
+    include_archived read paths. Returns the number of rows moved per kind.
+    """
+    age = f'-{int(days_old)} days'
+    moved = {'todo': 0, 'activities': 0, 'habits': 0}
+    with get_db_connection() as conn, _attached_archive(conn, create=True):
+        moved['todo'] = _move_in_batches(
+            conn, 'todo',
+            "SELECT id FROM todo WHERE created_at < datetime('now', ?) ORDER BY id LIMIT ?",
+            '''INSERT OR REPLACE INTO archive.todo (id, date, task, completed, created_at, uid)
+               SELECT id, date, task, completed, created_at, uid FROM todo WHERE id IN ({})''',
+            'DELETE FROM todo WHERE id IN ({})',
+            (age,), batch_size, pause)
+        
+        if include_activities:
+            moved['activities'] = _move_in_batches(
+                conn, 'activities',
+                f"SELECT id FROM activities WHERE {_ISO_DATE_SQL.format('date')} "
+                f"< date('now', ?) ORDER BY id LIMIT ?",
+                '''INSERT OR REPLACE INTO archive.activities (date, hour, activity)
+                   SELECT date, hour, activity FROM activities WHERE id IN ({})''',
+                'DELETE FROM activities WHERE id IN ({})',
+                (age,), batch_size, pause)
+        
+        if include_habits:
+            for habit in get_habit_names():
+                sanitized_name = _sanitize_habit_name(habit)
+                moved['habits'] += _move_in_batches(
+                    conn, 'habits',
+                    f"SELECT rowid FROM habit_{sanitized_name} "
+                    f"WHERE {_ISO_DATE_SQL.format('date')} < date('now', ?) LIMIT ?",
+                    f"INSERT OR REPLACE INTO archive.habits (habit, date, completed) "
+                    f"SELECT '{sanitized_name}', date, completed FROM habit_{sanitized_name} "
+                    f"WHERE rowid IN ({{}})",
+                    f'DELETE FROM habit_{sanitized_name} WHERE rowid IN ({{}})',
+                    (age,), batch_size, pause)
+    
+    return moved
 
 # Database maintenance
-def vacuum_database() -> None:
-    """Optimize database by running VACUUM command."""
+def get_auto_vacuum_mode() -> int:
+    """Get the auto_vacuum mode (0 = none, 1 = full, 2 = incremental)."""
     with get_db_connection() as conn:
+        return conn.execute('PRAGMA auto_vacuum').fetchone()[0]
+
+def enable_incremental_vacuum() -> None:
+    """Switch an existing database file to auto_vacuum=INCREMENTAL.
+    
+    This needs one full VACUUM, so it is only worth doing once on files
+    created before incremental mode became the default.
+    """
+    if get_auto_vacuum_mode() == 2:
+        return
+    with get_db_connection() as conn:
+        conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
         conn.execute('VACUUM')
 
+def reclaim_free_pages(max_pages: int = 256, db_path: Optional[str] = None) -> int:
+    """Return up to max_pages free pages to the file system. Returns pages reclaimed.
+    
+    Each call is a short write transaction, unlike VACUUM, which rewrites
+    and locks the whole file.
+    """
+    with get_db_connection(db_path) as conn:
+        if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+            return 0
+        before = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        if before:
+            # executescript steps the pragma to completion; execute() would free a single page
+            conn.executescript(f'PRAGMA incremental_vacuum({int(max_pages)});')
+        after = conn.execute('PRAGMA freelist_count').fetchone()[0]
+        return before - after
+
+def start_background_reclaim(interval: float = 300.0, pages_per_step: int = 256,
+                             step_pause: float = 0.05) -> threading.Event:
+    """Periodically reclaim free pages in a daemon thread. Set the returned event to stop."""
+    db_path = get_db_path()
+    stop = threading.Event()
+
+    def run():
+        while not stop.is_set():
+            try:
+                while not stop.is_set() and reclaim_free_pages(pages_per_step, db_path):
+                    stop.wait(step_pause)
+            except sqlite3.Error:
+                pass  # Busy or locked: try again next round
+            stop.wait(interval)
+    
+    threading.Thread(target=run, name='lifetrack-reclaim', daemon=True).start()
+    return stop
+
+def vacuum_database() -> None:
+    """Optimize database by reclaiming all free pages incrementally."""
+    enable_incremental_vacuum()
+    while reclaim_free_pages():
+        pass
+
 def get_database_info() -> dict:
     """Get database statistics and information."""
     with get_db_connection() as conn:
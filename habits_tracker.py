@@ -1,13 +1,17 @@
 import tkinter as tk
 from database import (
-    create_habit_table, add_habit_status, check_habit_status, get_habit_names
+    create_habit_table, add_habit_status
 )
+from instrumentation import latency
+from prefetch import load_snapshot
+from refresh_scheduler import Change, HABIT, change_callback
 
 class HabitsTracker:
-    def __init__(self, parent, current_date, update_callback=None):
+    def __init__(self, parent, current_date, update_callback=None, prefetcher=None):
         self.parent = parent
         self.current_date = current_date
-        self.update_callback = update_callback
+        self.update_callback = change_callback(update_callback)
+        self.prefetcher = prefetcher
         self.habit_vars = {}
         self.habit_checkboxes = {}
         self.create_widgets()
@@ -26,8 +30,8 @@ class HabitsTracker:
         self.habits_container = tk.Frame(self.main_frame, bg='#2C2C2C')
         self.habits_container.pack(fill=tk.BOTH, expand=True)
 
-    def load_habits(self):
-        """Load and display habits"""
+    def load_habits(self, snapshot=None):
+        """Load and display habits (from snapshot if given)"""
         # Clear existing widgets
         for widget in self.habits_container.winfo_children():
             widget.destroy()
@@ -35,29 +39,24 @@ class HabitsTracker:
         self.habit_vars.clear()
         self.habit_checkboxes.clear()
         
-        # Get existing habits or create default ones
-        existing_habits = get_habit_names() or [
-            'wake_up_7', 'study', 'project', 'github', 'exercise', 'productive_day', 
-            'journal', 'reading', 'plan_tomorrow', 'go_to_bed_22'
-        ]
-        
-        # Create habit tables if they don't exist
-        for habit in existing_habits:
-            create_habit_table(habit)
-        
-        # Initialize habits for current date
-        self._initialize_habits_for_date(existing_habits)
-        
+        # Get existing habits or create default ones (only on first run)
+        snapshot = snapshot or load_snapshot(self.current_date, self.prefetcher)
+        existing_habits = snapshot.habit_names
+        if not existing_habits:
+            existing_habits = [
+                'wake_up_7', 'study', 'project', 'github', 'exercise', 'productive_day', 
+                'journal', 'reading', 'plan_tomorrow', 'go_to_bed_22'
+            ]
+            for habit in existing_habits:
+                create_habit_table(habit)
+            snapshot = load_snapshot(self.current_date, self.prefetcher)
+                
         # Create checkboxes
         for habit in existing_habits:
             var = tk.BooleanVar()
             self.habit_vars[habit] = var
             
-            current_date = self.current_date.strftime("%d-%m-%Y")
-            habit_status = check_habit_status(habit, current_date)
-            
-            if habit_status is not None:
-                var.set(habit_status)
+            var.set(snapshot.habit_status(habit))
             
             checkbox = tk.Checkbutton(
                 self.habits_container, 
@@ -71,33 +70,26 @@ class HabitsTracker:
             checkbox.pack(anchor='w')
             self.habit_checkboxes[habit] = checkbox
 
-    def _initialize_habits_for_date(self, habits):
-        """Initialize habits for the current date if they don't exist"""
-        current_date = self.current_date.strftime("%d-%m-%Y")
-        for habit in habits:
-            if check_habit_status(habit, current_date) is None:
-                add_habit_status(habit, current_date, False)
-
     def save_habit_status(self, habit):
         """Save habit status to database"""
-        current_date = self.current_date.strftime("%d-%m-%Y")
-        status = self.habit_vars[habit].get()
-        add_habit_status(habit, current_date, status)
-        
-        if self.update_callback:
-            self.update_callback()
+        with latency.interaction('habit_toggle', self.habit_checkboxes.get(habit)):
+            current_date = self.current_date.strftime("%d-%m-%Y")
+            status = self.habit_vars[habit].get()
+            with latency.stage('database'):
+                add_habit_status(habit, current_date, status)
+            
+            if self.update_callback:
+                with latency.stage('update_callback'):
+                    self.update_callback(Change(HABIT, current_date, habit))
 
-    def update_date(self, new_date):
-        """Update current date and reload habits"""
+    def update_date(self, new_date, snapshot=None):
+        """Update current date and reload habits (read-only: no check-in means not done)"""
         self.current_date = new_date
-        
-        # Initialize habits for the new date if needed
-        existing_habits = list(self.habit_vars.keys())
-        self._initialize_habits_for_date(existing_habits)
+        snapshot = snapshot or load_snapshot(self.current_date, self.prefetcher)
         
         # Update habit checkboxes
         for habit in self.habit_vars:
-            current_date = self.current_date.strftime("%d-%m-%Y")
-            habit_status = check_habit_status(habit, current_date)
-            
-            self.habit_vars[habit].set(habit_status if habit_status is not None else False)
\ No newline at end of file
+            self.habit_vars[habit].set(snapshot.habit_status(habit))
+        
+        if self.prefetcher:
+            self.prefetcher.schedule(new_date)
\ No newline at end of file
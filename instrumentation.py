@@ -0,0 +1,221 @@
+import atexit
+import os
+import time
+from collections import defaultdict, deque, namedtuple
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+# Instrumentation configuration
+ENV_VAR = 'LIFETRACK_INSTRUMENT'
+REPORT_ENV_VAR = 'LIFETRACK_INSTRUMENT_REPORT'
+
+# Samples kept per measurement (and stalls kept); older ones are dropped, so
+# a long session with the heartbeat running does not grow without bound
+MAX_SAMPLES = 10000
+
+# Latency budgets in ms, checked against the p95 of each measurement
+DEFAULT_BUDGETS = {
+    'activity_keystroke/focus_advance': 16.0,
+    'habit_toggle': 16.0,
+    'todo_toggle': 16.0,
+}
+
+# A heartbeat that fired late: when, by how much, and the last interaction before it
+Stall = namedtuple('Stall', ['at', 'duration_ms', 'after_interaction'])
+
+_DISABLED = nullcontext()
+
+class _Interaction:
+    """One running or finished interaction, and the charts it is still waiting to see redrawn."""
+    __slots__ = ('name', 'started', 'pending_redraws')
+
+    def __init__(self, name: str, started: float):
+        self.name = name
+        self.started = started
+        self.pending_redraws = set()
+
+def percentile(values: Iterable[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+class LatencyRecorder:
+    """Opt-in timings of Tk input-to-render paths.
+
+    interaction(name) times one input event from the moment its handler
+    runs; inside it, stage(name) times a step (database write,
+    update_callback, redraw) and mark(name) records the time elapsed since
+    the event, e.g. when focus moves on. With a widget, the interaction also
+    records '<name>/rendered' once Tk is idle again, i.e. after the redraws
+    the handler caused directly. Charts redrawn later (debounced by the
+    RefreshScheduler) are linked back through expect_redraw()/redrawn():
+    '<name>/chart_rendered' is the time from the event until every chart
+    it made dirty has been redrawn. heartbeat() measures main-loop stalls.
+
+    Only the latest max_samples samples per measurement (and stalls) are
+    kept, so summaries cover recent activity. Meant for the Tk main thread
+    only. When disabled every hook is a no-op.
+    """
+
+    def __init__(self, enabled: bool = False, budgets: Optional[Dict[str, float]] = None,
+                 max_samples: int = MAX_SAMPLES):
+        self.enabled = enabled
+        self.budgets = dict(DEFAULT_BUDGETS if budgets is None else budgets)
+        self.samples = defaultdict(lambda: deque(maxlen=max_samples))
+        self.stalls = deque(maxlen=max_samples)
+        self._current: Optional[_Interaction] = None
+        self._awaiting_redraw = defaultdict(list)
+        self._last_interaction = None
+        self._heartbeat_id = None
+
+    def record(self, name: str, ms: float) -> None:
+        self.samples[name].append(ms)
+
+    def interaction(self, name: str, widget=None):
+        """Context manager timing one input event (nested calls time as stages)."""
+        if not self.enabled:
+            return _DISABLED
+        if self._current is not None:
+            return self.stage(name)
+        return self._interaction(name, widget)
+
+    @contextmanager
+    def _interaction(self, name: str, widget):
+        self._current = _Interaction(name, time.perf_counter())
+        try:
+            yield
+        finally:
+            started = self._current.started
+            self.record(name, (time.perf_counter() - started) * 1000)
+            self._current = None
+            self._last_interaction = name
+            if widget is not None:
+                widget.after_idle(lambda: self.record(
+                    f'{name}/rendered', (time.perf_counter() - started) * 1000))
+
+    def stage(self, name: str):
+        """Context manager timing a step of the current interaction (no-op outside one)."""
+        if not self.enabled or self._current is None:
+            return _DISABLED
+        return self._stage(f'{self._current.name}/{name}')
+
+    @contextmanager
+    def _stage(self, key: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(key, (time.perf_counter() - start) * 1000)
+
+    def mark(self, name: str) -> None:
+        """Record the time since the current interaction's event as '<interaction>/<name>'."""
+        if self.enabled and self._current is not None:
+            self.record(f'{self._current.name}/{name}',
+                        (time.perf_counter() - self._current.started) * 1000)
+
+    def expect_redraw(self, chart: str) -> None:
+        """Note that the current interaction made a chart dirty (no-op outside one)."""
+        if not self.enabled or self._current is None:
+            return
+        if chart not in self._current.pending_redraws:
+            self._current.pending_redraws.add(chart)
+            self._awaiting_redraw[chart].append(self._current)
+
+    def redrawn(self, chart: str, widget=None) -> None:
+        """Note that a chart was redrawn, counting it as rendered once widget's Tk is idle.
+
+        Records '<interaction>/chart_rendered' for every interaction waiting
+        on this chart that has no other charts left to wait for.
+        """
+        if not self.enabled:
+            return
+        waiting = self._awaiting_redraw.pop(chart, None)
+        if not waiting:
+            return
+
+        def rendered():
+            now = time.perf_counter()
+            for interaction in waiting:
+                interaction.pending_redraws.discard(chart)
+                if not interaction.pending_redraws:
+                    self.record(f'{interaction.name}/chart_rendered',
+                                (now - interaction.started) * 1000)
+
+        if widget is not None:
+            widget.after_idle(rendered)
+        else:
+            rendered()
+
+    def forget_redraw(self, chart: str) -> None:
+        """Stop waiting for a chart that will not be redrawn (e.g. unregistered)."""
+        for interaction in self._awaiting_redraw.pop(chart, []):
+            interaction.pending_redraws.discard(chart)
+
+    def heartbeat(self, root, interval_ms: int = 50, stall_ms: float = 100.0) -> None:
+        """Check every interval_ms that the main loop is responsive.
+
+        A tick that runs more than stall_ms late is logged as a stall.
+        """
+        if not self.enabled:
+            return
+
+        def tick(expected):
+            now = time.perf_counter()
+            late_ms = (now - expected) * 1000
+            self.record('heartbeat_lag', late_ms)
+            if late_ms > stall_ms:
+                self.stalls.append(Stall(datetime.now(), late_ms, self._last_interaction))
+            self._heartbeat_id = root.after(interval_ms, tick, now + interval_ms / 1000)
+
+        self.stop_heartbeat(root)
+        self._heartbeat_id = root.after(interval_ms, tick, time.perf_counter() + interval_ms / 1000)
+
+    def stop_heartbeat(self, root) -> None:
+        if self._heartbeat_id is not None:
+            root.after_cancel(self._heartbeat_id)
+            self._heartbeat_id = None
+
+    def summary(self) -> Dict[str, dict]:
+        """Get count, p50, p95, p99 and max (ms) per measurement."""
+        return {
+            name: {
+                'count': len(values),
+                'p50': percentile(values, 50),
+                'p95': percentile(values, 95),
+                'p99': percentile(values, 99),
+                'max': max(values),
+            }
+            for name, values in sorted(self.samples.items()) if values
+        }
+
+    def over_budget(self) -> Dict[str, float]:
+        """Get the measurements whose p95 exceeds their budget, with that p95."""
+        summary = self.summary()
+        return {name: summary[name]['p95'] for name, budget in self.budgets.items()
+                if name in summary and summary[name]['p95'] > budget}
+
+    def report(self) -> str:
+        over = self.over_budget()
+        lines = [f"{'measurement':<40} {'count':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}  budget"]
+        for name, stats in self.summary().items():
+            budget = self.budgets.get(name)
+            verdict = '' if budget is None else f"{budget:g} ms {'OVER' if name in over else 'ok'}"
+            lines.append(f"{name:<40} {stats['count']:>6} {stats['p50']:>8.2f} {stats['p95']:>8.2f} "
+                         f"{stats['p99']:>8.2f} {stats['max']:>8.2f}  {verdict}".rstrip())
+
+        lines.append('')
+        lines.append(f"Main-loop stalls: {len(self.stalls)}")
+        for stall in self.stalls:
+            lines.append(f"{stall.at:%Y-%m-%d %H:%M:%S.%f} {stall.duration_ms:8.1f} ms "
+                         f"after {stall.after_interaction or '-'}")
+        return '\n'.join(lines) + '\n'
+
+    def write_report(self, path: str) -> None:
+        with open(path, 'w') as f:
+            f.write(self.report())
+
+# Shared recorder used by the trackers; enable with LIFETRACK_INSTRUMENT=1
+latency = LatencyRecorder(enabled=os.environ.get(ENV_VAR) == '1')
+
+if latency.enabled and os.environ.get(REPORT_ENV_VAR):
+    atexit.register(latency.write_report, os.environ[REPORT_ENV_VAR])
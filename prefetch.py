@@ -0,0 +1,155 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Optional, Tuple, Union
+
+from database import (
+    DaySnapshot, get_db_path, use_database, add_change_listener, remove_change_listener, load_day
+)
+
+def _date_str(day: Union[str, date, datetime]) -> str:
+    return day if isinstance(day, str) else day.strftime("%d-%m-%Y")
+
+def load_snapshot(day: Union[str, date, datetime],
+                  prefetcher: Optional['DayPrefetcher'] = None) -> DaySnapshot:
+    """Get the DaySnapshot for a day, from the prefetch cache if a prefetcher is given."""
+    if prefetcher:
+        return prefetcher.load(day)
+    return load_day(_date_str(day))
+
+class DayCache:
+    """Bounded, thread-safe LRU store of DaySnapshots keyed by DD-MM-YYYY date.
+    
+    Loads go through begin_load()/end_load(). While a date has loads in
+    flight it has a generation counter that invalidate() bumps, so a load
+    that started before a write cannot store stale data; the counter is
+    dropped once no load of that date is running.
+    """
+
+    def __init__(self, capacity: int = 31):
+        self.capacity = capacity
+        self._days = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._loading: Dict[str, int] = {}
+        self._epoch = 0
+        self._lock = threading.Lock()
+
+    def get(self, date_str: str) -> Optional[DaySnapshot]:
+        with self._lock:
+            day = self._days.get(date_str)
+            if day is not None:
+                self._days.move_to_end(date_str)
+            return day
+
+    def __contains__(self, date_str: str) -> bool:
+        with self._lock:
+            return date_str in self._days
+
+    def begin_load(self, date_str: str) -> Tuple[int, int]:
+        """Register a load of date_str. Returns the generation to pass to end_load()."""
+        with self._lock:
+            self._loading[date_str] = self._loading.get(date_str, 0) + 1
+            return self._epoch, self._generations.get(date_str, 0)
+
+    def end_load(self, date_str: str, day: Optional[DaySnapshot],
+                 generation: Tuple[int, int]) -> bool:
+        """Finish a load (day is None if it failed), storing the day unless it was
+        invalidated since begin_load(). Returns whether it was stored."""
+        with self._lock:
+            current = (self._epoch, self._generations.get(date_str, 0))
+            remaining = self._loading.pop(date_str) - 1
+            if remaining:
+                self._loading[date_str] = remaining
+            else:
+                self._generations.pop(date_str, None)
+            
+            if day is None or current != generation:
+                return False
+            self._days[date_str] = day
+            self._days.move_to_end(date_str)
+            while len(self._days) > self.capacity:
+                self._days.popitem(last=False)
+            return True
+
+    def invalidate(self, date_str: Optional[str] = None) -> None:
+        """Drop one date, or every date when date_str is None."""
+        with self._lock:
+            if date_str is None:
+                self._days.clear()
+                self._epoch += 1
+            else:
+                self._days.pop(date_str, None)
+                # Only loads in flight can hold an older generation
+                if date_str in self._loading:
+                    self._generations[date_str] = self._generations.get(date_str, 0) + 1
+
+class DayPrefetcher:
+    """Loads days around the current date in a background thread.
+
+    Trackers read through load(); after a date change, schedule() warms the
+    cache with the days within radius so stepping through dates is served
+    from memory. Writes to the database invalidate the affected day.
+    """
+
+    def __init__(self, radius: int = 3, capacity: int = 31,
+                 loader: Callable[[str], DaySnapshot] = load_day):
+        self.radius = radius
+        self.cache = DayCache(max(capacity, 2 * radius + 1))
+        self.loader = loader
+        self.db_path = get_db_path()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='lifetrack-prefetch')
+        self._pending = set()
+        self._pending_lock = threading.Lock()
+        add_change_listener(self._on_change)
+
+    def _on_change(self, db_path: str, table: str, date_str: Optional[str]) -> None:
+        if db_path == self.db_path:
+            self.cache.invalidate(date_str)
+
+    def _fetch(self, date_str: str) -> DaySnapshot:
+        generation = self.cache.begin_load(date_str)
+        day = None
+        try:
+            with use_database(self.db_path):
+                day = self.loader(date_str)
+        finally:
+            self.cache.end_load(date_str, day, generation)
+        return day
+
+    def _background_fetch(self, date_str: str) -> None:
+        try:
+            if date_str not in self.cache:
+                self._fetch(date_str)
+        finally:
+            with self._pending_lock:
+                self._pending.discard(date_str)
+
+    def get(self, date_str: str) -> Optional[DaySnapshot]:
+        """Get a cached day without touching the database."""
+        return self.cache.get(date_str)
+
+    def load(self, day: Union[str, date, datetime]) -> DaySnapshot:
+        """Get a day (DD-MM-YYYY string or date) from the cache, reading it synchronously on a miss."""
+        date_str = _date_str(day)
+        snapshot = self.cache.get(date_str)
+        if snapshot is None:
+            snapshot = self._fetch(date_str)
+        return snapshot
+
+    def schedule(self, center: Union[date, datetime]) -> None:
+        """Queue background loads for the days around center, nearest first."""
+        if isinstance(center, datetime):
+            center = center.date()
+        for distance in range(1, self.radius + 1):
+            for offset in (distance, -distance):
+                date_str = _date_str(center + timedelta(days=offset))
+                with self._pending_lock:
+                    if date_str in self._pending or date_str in self.cache:
+                        continue
+                    self._pending.add(date_str)
+                self._executor.submit(self._background_fetch, date_str)
+
+    def close(self) -> None:
+        remove_change_listener(self._on_change)
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,173 @@
+import os
+import re
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import analytics
+import database
+from analytics import DayMatrices
+from database import DB_DIR, DB_PATH, get_db_connection, use_database, initialize_database, _chunked
+
+# Profile configuration
+PROFILES_DIR = os.path.join(DB_DIR, 'profiles')
+DEFAULT_PROFILE = 'default'
+
+# SQLite allows at most 10 attached databases per connection by default
+MAX_ATTACHED = 10
+
+def _sanitize_profile_name(name: str) -> str:
+    """Sanitize profile name for safe use as a file name."""
+    return re.sub(r'[^A-Za-z0-9_-]', '', name)
+
+def get_profile_path(name: str) -> str:
+    """Get the database file for a profile (the default profile keeps data.db)."""
+    if name == DEFAULT_PROFILE:
+        return DB_PATH
+    return os.path.join(PROFILES_DIR, f'{_sanitize_profile_name(name)}.db')
+
+def list_profiles() -> List[str]:
+    """Get the default profile followed by all profiles found on disk.
+
+    Only files a profile name can map to count, so a profile's archive
+    (<name>.archive.db, see database.get_archive_path) is not listed.
+    """
+    profiles = [DEFAULT_PROFILE]
+    if os.path.isdir(PROFILES_DIR):
+        names = (f[:-3] for f in os.listdir(PROFILES_DIR) if f.endswith('.db'))
+        profiles += sorted(name for name in names if name and _sanitize_profile_name(name) == name)
+    return profiles
+
+class ProfileDatabase:
+    """Handle for a single profile's database file.
+
+    All functions in the database module can be routed to this profile with
+    ``activate()`` or ``run()``; the routing is per thread, so several
+    profiles can be queried in parallel.
+    """
+
+    def __init__(self, name: str = DEFAULT_PROFILE, path: Optional[str] = None):
+        """Open a profile by name, or any database file when path is given."""
+        self.name = name
+        self.path = path or get_profile_path(name)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self.activate():
+            initialize_database()
+
+    def __repr__(self):
+        return f'ProfileDatabase({self.name!r})'
+
+    def activate(self):
+        """Context manager routing database functions to this profile."""
+        return use_database(self.path)
+
+    def connection(self):
+        """Open a connection to this profile's database file."""
+        return get_db_connection(self.path)
+
+    def run(self, func: Callable, *args, **kwargs):
+        """Call a database function against this profile."""
+        with self.activate():
+            return func(*args, **kwargs)
+
+    # Stats source interface used by StatsWidgets
+    def get_habit_names(self) -> List[str]:
+        return self.run(database.get_habit_names)
+
+    def get_daily_habit_counts(self, dates: Iterable[str]) -> Dict[str, Tuple[int, int]]:
+        return self.run(database.get_daily_habit_counts, list(dates))
+
+    def get_habit_completion_counts(self, dates: Iterable[str]) -> Dict[str, Tuple[int, int]]:
+        return self.run(database.get_habit_completion_counts, list(dates))
+
+    def get_activity_counts(self, dates: Iterable[str]) -> Dict[str, int]:
+        return self.run(database.get_activity_counts, list(dates))
+
+    def load_day_matrices(self, start, end) -> DayMatrices:
+        return self.run(analytics.load_matrices, start, end)
+
+class ProfileGroup:
+    """Aggregate view over several profiles.
+
+    Exposes the same stats source interface as ProfileDatabase, so StatsWidgets
+    can render a combined (team) view. Activity counts are computed in one
+    connection with ATTACH; habit data lives in per-habit tables, so habit
+    queries fan out across a thread pool instead.
+    """
+
+    def __init__(self, profiles: Iterable[ProfileDatabase], max_workers: Optional[int] = None):
+        self.profiles = list(profiles)
+        self.max_workers = max_workers or min(8, len(self.profiles)) or 1
+
+    @classmethod
+    def from_names(cls, names: Iterable[str], max_workers: Optional[int] = None) -> 'ProfileGroup':
+        return cls([ProfileDatabase(name) for name in names], max_workers)
+
+    def map(self, func: Callable, *args, **kwargs) -> Dict[str, object]:
+        """Run a database function against every profile in parallel."""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {p.name: executor.submit(p.run, func, *args, **kwargs) for p in self.profiles}
+            return {name: future.result() for name, future in futures.items()}
+
+    def get_habit_names(self) -> List[str]:
+        names = set()
+        for habits in self.map(database.get_habit_names).values():
+            names.update(habits)
+        return sorted(names)
+
+    def get_daily_habit_counts(self, dates: Iterable[str]) -> Dict[str, Tuple[int, int]]:
+        dates = list(dates)
+        totals = {date: (0, 0) for date in dates}
+        for counts in self.map(database.get_daily_habit_counts, dates).values():
+            for date, (completed, possible) in counts.items():
+                total_completed, total_possible = totals[date]
+                totals[date] = (total_completed + completed, total_possible + possible)
+        return totals
+
+    def get_habit_completion_counts(self, dates: Iterable[str]) -> Dict[str, Tuple[int, int]]:
+        dates = list(dates)
+        totals = {}
+        for counts in self.map(database.get_habit_completion_counts, dates).values():
+            for habit, (completed, tracked) in counts.items():
+                total_completed, total_tracked = totals.get(habit, (0, 0))
+                totals[habit] = (total_completed + completed, total_tracked + tracked)
+        return totals
+
+    def load_day_matrices(self, start, end) -> DayMatrices:
+        """Stack every profile's days, so relationships are computed over all of them."""
+        return DayMatrices.concatenate(list(self.map(analytics.load_matrices, start, end).values()))
+
+    def get_activity_counts(self, dates: Iterable[str]) -> Dict[str, int]:
+        dates = list(dates)
+        counts = {}
+        for start in range(0, len(self.profiles), MAX_ATTACHED):
+            batch = self.profiles[start:start + MAX_ATTACHED]
+            for activity, count in self._attached_activity_counts(batch, dates):
+                counts[activity] = counts.get(activity, 0) + count
+        return counts
+
+    def _attached_activity_counts(self, profiles: List[ProfileDatabase],
+                                  dates: List[str]) -> List[Tuple[str, int]]:
+        """Count activities across profiles with one query per chunk of dates over attached databases."""
+        conn = sqlite3.connect(':memory:')
+        try:
+            for i, profile in enumerate(profiles):
+                conn.execute(f'ATTACH DATABASE ? AS p{i}', (profile.path,))
+
+            # Every profile binds the chunk again, so keep chunk * profiles under the parameter limit
+            counts = {}
+            for chunk in _chunked(dates, max(1, 500 // len(profiles))):
+                placeholders = ','.join('?' * len(chunk))
+                union = ' UNION ALL '.join(
+                    f'SELECT activity FROM p{i}.activities WHERE date IN ({placeholders})'
+                    for i in range(len(profiles))
+                )
+                cursor = conn.execute(
+                    f'SELECT activity, COUNT(*) FROM ({union}) GROUP BY activity',
+                    chunk * len(profiles)
+                )
+                for activity, count in cursor.fetchall():
+                    counts[activity] = counts.get(activity, 0) + count
+            return list(counts.items())
+        finally:
+            conn.close()
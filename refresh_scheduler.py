@@ -0,0 +1,159 @@
+import inspect
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, Optional
+
+from instrumentation import latency
+
+# Change kinds reported by the trackers
+ACTIVITY = 'activity'
+HABIT = 'habit'
+TASK = 'task'
+ALL_KINDS = (ACTIVITY, HABIT, TASK)
+
+# What a tracker changed: kind, the DD-MM-YYYY date, and the habit for habit changes
+Change = namedtuple('Change', ['kind', 'date', 'habit'], defaults=(None, None))
+
+def change_callback(callback: Optional[Callable]) -> Optional[Callable[[Change], None]]:
+    """Adapt a tracker's update_callback to be called with a Change.
+    
+    Callbacks that take no arguments (the original contract) are wrapped
+    so they keep working and simply ignore the change.
+    """
+    if callback is None:
+        return None
+    try:
+        inspect.signature(callback).bind(None)
+    except TypeError:
+        return lambda change: callback()
+    except ValueError:
+        pass  # No signature available (some builtins); assume it takes the change
+    return callback
+
+def covers_recent_days(days: int) -> Callable[[str], bool]:
+    """Build a covers() predicate for widgets that show the last `days` days."""
+    def covers(date_str: str) -> bool:
+        day = datetime.strptime(date_str, "%d-%m-%Y").date()
+        today = datetime.now().date()
+        return today - timedelta(days=days) < day <= today
+    return covers
+
+class _Registration:
+    __slots__ = ('refresh', 'kinds', 'covers', 'widget')
+
+    def __init__(self, refresh, kinds, covers, widget):
+        self.refresh = refresh
+        self.kinds = frozenset(kinds)
+        self.covers = covers
+        self.widget = widget
+
+    def affected_by(self, change: Optional[Change]) -> bool:
+        if change is None:
+            return True
+        if change.kind not in self.kinds:
+            return False
+        return change.date is None or self.covers is None or self.covers(change.date)
+
+class RefreshScheduler:
+    """Coalesces tracker change notifications into debounced widget refreshes.
+
+    Pass notify as the trackers' update_callback. Each change marks only the
+    widgets registered for that kind of change (and date) dirty; dirty
+    widgets are refreshed once, delay_ms after the last change of a burst,
+    but never later than max_delay_ms after the first one. Widgets that are
+    not mapped stay dirty and refresh when they are shown.
+    """
+
+    def __init__(self, root, delay_ms: int = 250, max_delay_ms: int = 1000):
+        self.root = root
+        self.delay_ms = delay_ms
+        self.max_delay_ms = max_delay_ms
+        self._widgets = {}
+        self._dirty = set()
+        self._after_id = None
+        self._burst_start = None
+        self.requested = 0
+        self.performed = 0
+        self.skipped_hidden = 0
+
+    def register(self, name: str, refresh: Callable[[], None],
+                 kinds: Iterable[str] = ALL_KINDS,
+                 covers: Optional[Callable[[str], bool]] = None, widget=None) -> None:
+        """Register a widget refresh.
+
+        kinds: change kinds that affect the widget.
+        covers: optional predicate on a change's date; changes to dates it
+            rejects do not mark the widget dirty.
+        widget: Tk widget whose visibility decides whether to refresh now.
+        """
+        self._widgets[name] = _Registration(refresh, kinds, covers, widget)
+        if widget is not None:
+            widget.bind('<Map>', lambda e: self._schedule(), add='+')
+
+    def unregister(self, name: str) -> None:
+        self._widgets.pop(name, None)
+        self._dirty.discard(name)
+        latency.forget_redraw(name)
+
+    def notify(self, change: Optional[Change] = None) -> None:
+        """Record a change (None means everything changed) and schedule a refresh."""
+        self.requested += 1
+        for name, registration in self._widgets.items():
+            if registration.affected_by(change):
+                self._dirty.add(name)
+                latency.expect_redraw(name)
+        self._schedule()
+
+    def _schedule(self) -> None:
+        if not self._dirty:
+            return
+
+        now = time.monotonic()
+        if self._after_id is not None:
+            # Keep debouncing, unless the burst has already waited long enough
+            if (now - self._burst_start) * 1000 >= self.max_delay_ms - self.delay_ms:
+                return
+            self.root.after_cancel(self._after_id)
+        else:
+            self._burst_start = now
+        self._after_id = self.root.after(self.delay_ms, self.flush)
+
+    def _is_visible(self, registration: _Registration) -> bool:
+        widget = registration.widget
+        return widget is None or bool(widget.winfo_ismapped())
+
+    def flush(self) -> None:
+        """Refresh every dirty, visible widget now."""
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+
+        with latency.interaction('chart_redraw', self.root):
+            for name in list(self._dirty):
+                registration = self._widgets.get(name)
+                if registration is None:
+                    self._dirty.discard(name)
+                    continue
+                if not self._is_visible(registration):
+                    self.skipped_hidden += 1
+                    continue
+                self._dirty.discard(name)
+                with latency.stage(name):
+                    registration.refresh()
+                latency.redrawn(name, self.root)
+                self.performed += 1
+
+    def stats(self) -> dict:
+        """Get refresh counters: requested (notifications) versus performed (widget refreshes)."""
+        return {
+            'requested': self.requested,
+            'performed': self.performed,
+            'skipped_hidden': self.skipped_hidden,
+            'pending': len(self._dirty),
+        }
+
+    def report(self) -> str:
+        stats = self.stats()
+        return (f"Refreshes requested: {stats['requested']}, performed: {stats['performed']} "
+                f"(skipped while hidden: {stats['skipped_hidden']}, pending: {stats['pending']})")
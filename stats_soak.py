@@ -0,0 +1,83 @@
+"""Soak test for StatsWidgets figure reuse.
+
+Builds a throwaway synthetic database, redraws every chart --refreshes
+times in a Tk window and checks that resident memory stays flat. Needs a
+display (e.g. run under xvfb-run).
+"""
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import tkinter as tk
+
+from api_loadtest import build_dataset
+from profiles import ProfileDatabase
+from stats_widgets import StatsWidgets
+
+def rss_mb() -> float:
+    """Get current resident set size in MiB (peak RSS where /proc is unavailable)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def run_soak(source: ProfileDatabase, args) -> bool:
+    """Redraw the charts from source and report whether RSS stayed within the limit."""
+    root = tk.Tk()
+    root.title("StatsWidgets soak test")
+    heatmap_frame = tk.Frame(root, bg='#2C2C2C')
+    heatmap_frame.pack(fill=tk.BOTH, expand=True)
+    bottom_frame = tk.Frame(root, bg='#2C2C2C')
+    bottom_frame.pack(fill=tk.BOTH, expand=True)
+    pie_frame = tk.Frame(bottom_frame, bg='#2C2C2C')
+    pie_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+    progress_frame = tk.Frame(bottom_frame, bg='#2C2C2C')
+    progress_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+    stats = StatsWidgets(source)
+    baseline = None
+    for i in range(1, args.refreshes + 1):
+        stats.create_habit_heatmap(heatmap_frame)
+        stats.create_activity_pie_chart(pie_frame)
+        stats.create_habit_progress_bars(progress_frame)
+        root.update()
+
+        if i == args.warmup:
+            baseline = rss_mb()
+        if i % 100 == 0:
+            print(f"refresh {i}: RSS {rss_mb():.1f} MiB, live figures {stats.live_figures()}")
+
+    final = rss_mb()
+    stats.dispose()
+    root.destroy()
+
+    growth = final - (baseline if baseline is not None else final)
+    print(f"RSS after warmup {baseline or final:.1f} MiB, after {args.refreshes} refreshes "
+          f"{final:.1f} MiB (growth {growth:+.1f} MiB, limit {args.max_growth_mb} MiB)")
+    if growth > args.max_growth_mb:
+        print("FAIL: memory grew during refreshes")
+        return False
+    print("OK")
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--refreshes', type=int, default=1000)
+    parser.add_argument('--warmup', type=int, default=50,
+                        help="refreshes before the baseline RSS is taken")
+    parser.add_argument('--max-growth-mb', type=float, default=20.0,
+                        help="fail if RSS grows more than this after warmup")
+    parser.add_argument('--days', type=int, default=365, help="days of synthetic data")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'soak.db')
+        build_dataset(db_path, args.days)
+        ok = run_soak(ProfileDatabase('soak', db_path), args)
+    if not ok:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
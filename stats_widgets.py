@@ -1,20 +1,112 @@
 import tkinter as tk
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.colors import BoundaryNorm
+from matplotlib.figure import Figure
 import numpy as np
 from datetime import datetime, timedelta
-from collections import defaultdict
-from database import (
-    get_habit_names, get_activities_by_date, check_habit_status
-)
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from analytics import strongest_relationships
+from profiles import ProfileDatabase
+from refresh_scheduler import ACTIVITY, HABIT, covers_recent_days
+
+class _Chart:
+    """A figure, its axes and the Tk canvas showing it, reused across redraws."""
+    __slots__ = ('figure', 'ax', 'canvas')
+
+    def __init__(self, figure, ax, canvas):
+        self.figure = figure
+        self.ax = ax
+        self.canvas = canvas
 
 class StatsWidgets:
-    def __init__(self):
+    def __init__(self, source=None, max_figures=8):
+        """Render stats for a ProfileDatabase, or a ProfileGroup for combined stats.
+        
+        Each chart keeps one figure and canvas per parent frame and redraws
+        into it; at most max_figures stay alive (least recently drawn go first).
+        """
         plt.style.use('dark_background')
+        self.source = source or ProfileDatabase()
+        self.max_figures = max_figures
+        self._charts = OrderedDict()
+        self._rows = {}
+        self._analysis = ThreadPoolExecutor(max_workers=1, thread_name_prefix='lifetrack-analytics')
+        self._analysis_jobs = {}
+    
+    def _get_chart(self, name, parent, width, height):
+        """Get a cleared figure and axes for a chart, creating them on first use."""
+        key = (name, str(parent))
+        chart = self._charts.get(key)
+        if chart is not None and chart.canvas.get_tk_widget().winfo_exists():
+            self._charts.move_to_end(key)
+            chart.figure.clear()
+            chart.ax = chart.figure.add_subplot()
+            return chart
+        if chart is not None:
+            self._dispose_chart(key)
+        
+        # Figure() rather than pyplot, so figures are not kept alive by pyplot's registry
+        figure = Figure(figsize=(width, height), facecolor='#2C2C2C')
+        canvas = FigureCanvasTkAgg(figure, parent)
+        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        chart = _Chart(figure, figure.add_subplot(), canvas)
+        self._charts[key] = chart
         
+        while len(self._charts) > self.max_figures:
+            self._dispose_chart(next(iter(self._charts)))
+        return chart
+    
+    def _dispose_chart(self, key):
+        chart = self._charts.pop(key)
+        widget = chart.canvas.get_tk_widget()
+        if widget.winfo_exists():
+            widget.destroy()
+        chart.figure.clear()
+    
+    def _take_rows(self, name, parent):
+        """Destroy the Tk rows a panel drew into parent last time and get a fresh list."""
+        key = (name, str(parent))
+        for row in self._rows.pop(key, []):
+            row.destroy()
+        return self._rows.setdefault(key, [])
+    
+    def dispose(self, parent=None):
+        """Destroy the figures and canvases of all charts, or only those in parent."""
+        for key in list(self._charts):
+            if parent is None or key[1] == str(parent):
+                self._dispose_chart(key)
+        for key in list(self._rows):
+            if parent is None or key[1] == str(parent):
+                for row in self._rows.pop(key):
+                    row.destroy()
+    
+    def live_figures(self):
+        """Get the number of figures currently kept alive."""
+        return len(self._charts)
+                
+    def register_refreshes(self, scheduler, heatmap_parent=None, pie_parent=None,
+                           progress_parent=None):
+        """Register the charts with a RefreshScheduler so each redraws only on relevant changes.
+        
+        The relationships panel refreshes on its own schedule instead (schedule_relationships).
+        """
+        charts = [
+            ('habit_heatmap', heatmap_parent, self.create_habit_heatmap, (HABIT,), 372),
+            ('activity_pie', pie_parent, self.create_activity_pie_chart, (ACTIVITY,), 30),
+            ('habit_progress', progress_parent, self.create_habit_progress_bars, (HABIT,), 30),
+        ]
+        for name, parent, create, kinds, days in charts:
+            if parent is None:
+                continue
+            scheduler.register(name, lambda p=parent, c=create: c(p),
+                               kinds, covers_recent_days(days), widget=parent)
+
     def create_habit_heatmap(self, parent, width=10, height=2):
-        """Create GitHub-style habit completion heatmap."""
-        fig, ax = plt.subplots(figsize=(width, height), facecolor='#2C2C2C')
+        """Create (or redraw) GitHub-style habit completion heatmap."""
+        chart = self._get_chart('habit_heatmap', parent, width, height)
+        fig, ax = chart.figure, chart.ax
         fig.patch.set_facecolor('#2C2C2C')
         ax.set_facecolor('#2C2C2C')
         
@@ -26,35 +118,30 @@ class StatsWidgets:
         
         start_date = current_week_end - timedelta(days=365)
         
-        habits = get_habit_names()
+        habits = self.source.get_habit_names()
         if not habits:
             ax.text(0.5, 0.5, 'No habit data available', 
                    transform=ax.transAxes, ha='center', va='center',
                    fontsize=12, color='white')
         else:
             # Calculate completion percentages for each day
-            date_scores = {}
-            current_date = start_date
+            days = [start_date + timedelta(days=i)
+                    for i in range((current_week_end - start_date).days + 1)]
+            daily_counts = self.source.get_daily_habit_counts(
+                day.strftime("%d-%m-%Y") for day in days)
             
-            while current_date <= current_week_end:
-                date_str = current_date.strftime("%d-%m-%Y")
-                completed_habits = sum(1 for habit in habits 
-                                     if check_habit_status(habit, date_str))
-                completion_rate = (completed_habits / len(habits)) if len(habits) > 0 else 0
-                date_scores[current_date] = completion_rate
-                current_date += timedelta(days=1)
+            date_scores = {}
+            for day in days:
+                completed_habits, possible = daily_counts[day.strftime("%d-%m-%Y")]
+                date_scores[day] = (completed_habits / possible) if possible > 0 else 0
             
             # Create GitHub-style calendar heatmap
             self._create_github_heatmap(ax, date_scores, start_date, current_week_end, end_date)
         
-        plt.tight_layout()
+        fig.tight_layout()
+        chart.canvas.draw_idle()
         
-        # Add canvas to frame
-        canvas = FigureCanvasTkAgg(fig, parent)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-        
-        return canvas
+        return chart.canvas
     
     def _create_github_heatmap(self, ax, date_scores, start_date, current_week_end, today):
         """Create a GitHub-style calendar heatmap."""
@@ -107,7 +194,7 @@ class StatsWidgets:
         
         # Create heatmap with discrete levels
         levels = [-1, 0, 0.2, 0.4, 0.6, 0.8, 1.0]
-        norm = plt.matplotlib.colors.BoundaryNorm(levels, cmap.N)
+        norm = BoundaryNorm(levels, cmap.N)
         
         im = ax.imshow(heatmap_data, cmap=cmap, norm=norm, aspect='auto')
         
@@ -147,8 +234,9 @@ class StatsWidgets:
             spine.set_visible(False)
     
     def create_activity_pie_chart(self, parent, width=6, height=4):
-        """Create activity breakdown pie chart."""
-        fig, ax = plt.subplots(figsize=(width, height), facecolor='#2C2C2C')
+        """Create (or redraw) activity breakdown pie chart."""
+        chart = self._get_chart('activity_pie', parent, width, height)
+        fig, ax = chart.figure, chart.ax
         fig.patch.set_facecolor('#2C2C2C')
         
         # Get activity data for the last 30 days
@@ -160,14 +248,10 @@ class StatsWidgets:
         }
         
         end_date = datetime.now().date()
-        for i in range(30):
-            current_date = end_date - timedelta(days=i)
-            date_str = current_date.strftime("%d-%m-%Y")
-            activities = get_activities_by_date(date_str)
-            
-            for hour, activity in activities:
-                if activity in legend:
-                    activity_counts[legend[activity]] += 1
+        dates = [(end_date - timedelta(days=i)).strftime("%d-%m-%Y") for i in range(30)]
+        for activity, count in self.source.get_activity_counts(dates).items():
+            if activity in legend:
+                activity_counts[legend[activity]] += count
         
         if not activity_counts:
             ax.text(0.5, 0.5, 'No activity data available', 
@@ -198,41 +282,32 @@ class StatsWidgets:
             ax.set_title('Activity Breakdown (Last 30 Days)', 
                         fontsize=11, color='white', pad=10)
         
-        plt.tight_layout()
-        
-        # Add canvas to frame
-        canvas = FigureCanvasTkAgg(fig, parent)
-        canvas.draw()
-        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+        fig.tight_layout()
+        chart.canvas.draw_idle()
         
-        return canvas
+        return chart.canvas
     
     def create_habit_progress_bars(self, parent):
-        """Create progress bars for individual habits over the last 30 days."""
-        habits = get_habit_names()
+        """Create (or redraw) progress bars for individual habits over the last 30 days."""
+        # Replace the rows drawn into this parent last time
+        rows = self._take_rows('habit_progress', parent)
+        
+        habits = self.source.get_habit_names()
         if not habits:
-            tk.Label(parent, text="No habit data available", 
-                    bg='#2C2C2C', fg='white', font=('JetBrains Mono', 10)).pack()
+            label = tk.Label(parent, text="No habit data available", 
+                    bg='#2C2C2C', fg='white', font=('JetBrains Mono', 10))
+            label.pack()
+            rows.append(label)
             return
         
         # Calculate completion rates for each habit
         end_date = datetime.now().date()
+        dates = [(end_date - timedelta(days=i)).strftime("%d-%m-%Y") for i in range(30)]
+        completion_counts = self.source.get_habit_completion_counts(dates)
         habit_completion = {}
         
         for habit in habits:
-            completed_days = 0
-            total_days = 0
-            
-            for i in range(30):
-                current_date = end_date - timedelta(days=i)
-                date_str = current_date.strftime("%d-%m-%Y")
-                status = check_habit_status(habit, date_str)
-                
-                if status is not None:
-                    total_days += 1
-                    if status:
-                        completed_days += 1
-            
+            completed_days, total_days = completion_counts.get(habit, (0, 0))
             if total_days > 0:
                 habit_completion[habit] = (completed_days / total_days) * 100
         
@@ -241,6 +316,7 @@ class StatsWidgets:
             # Habit name
             habit_frame = tk.Frame(parent, bg='#2C2C2C')
             habit_frame.pack(fill='x', pady=2)
+            rows.append(habit_frame)
             
             tk.Label(habit_frame, text=f"{habit}: {completion_rate:.1f}%", 
                     bg='#2C2C2C', fg='white', font=('JetBrains Mono', 9),
@@ -255,4 +331,96 @@ class StatsWidgets:
             if fill_width > 0:
                 fill_color = '#26a641' if completion_rate >= 70 else '#006d32' if completion_rate >= 50 else '#0e4429'
                 progress_fill = tk.Frame(progress_frame, bg=fill_color, height=10)
-                progress_fill.place(x=0, y=0, width=f"{fill_width}%", height=10)
\ No newline at end of file
+                progress_fill.place(x=0, y=0, width=f"{fill_width}%", height=10)
+
+    def create_relationships_panel(self, parent, top=8, days=3650, poll_ms=100):
+        """Create (or refresh) the strongest activity/habit relationships over the last `days` days.
+        
+        Loading and analysing that much data runs in a background thread;
+        the rows are redrawn from the Tk main loop once it is done, and the
+        previous rows stay up until then.
+        """
+        key = ('relationships', str(parent))
+        job = self._analysis_jobs.get(key)
+        if job is not None and not job.done():
+            return
+        if key not in self._rows:
+            self._show_relationships(parent, None)
+        
+        job = self._analysis.submit(self._find_relationships, top, days)
+        self._analysis_jobs[key] = job
+        
+        def poll():
+            if not parent.winfo_exists():
+                return
+            if not job.done():
+                parent.after(poll_ms, poll)
+                return
+            try:
+                relationships = job.result()
+            except Exception as e:
+                print(f"Error computing relationships: {e}")
+                return
+            self._show_relationships(parent, relationships)
+        
+        parent.after(poll_ms, poll)
+    
+    def schedule_relationships(self, parent, interval_ms=10 * 60 * 1000, **kwargs):
+        """Refresh the relationships panel now and then every interval_ms while it is shown.
+        
+        Ten years of data barely move with one edit, so the panel is not
+        tied to the RefreshScheduler's per-change refreshes.
+        """
+        def tick():
+            if not parent.winfo_exists():
+                return
+            if parent.winfo_ismapped():
+                self.create_relationships_panel(parent, **kwargs)
+            parent.after(interval_ms, tick)
+        
+        self.create_relationships_panel(parent, **kwargs)
+        parent.after(interval_ms, tick)
+    
+    def _find_relationships(self, top, days):
+        """Load and analyse the data for the relationships panel (runs in a worker thread)."""
+        end_date = datetime.now().date()
+        matrices = self.source.load_day_matrices(end_date - timedelta(days=days - 1), end_date)
+        return strongest_relationships(matrices, top=top)
+    
+    def _show_relationships(self, parent, relationships):
+        """Draw the relationships panel rows; None means they are still being computed."""
+        rows = self._take_rows('relationships', parent)
+        
+        title = tk.Label(parent, text="Strongest Relationships", 
+                bg='#2C2C2C', fg='white', font=('JetBrains Mono', 10, 'bold'))
+        title.pack(anchor='w', pady=(0, 4))
+        rows.append(title)
+        
+        if not relationships:
+            text = "Computing..." if relationships is None else "No clear relationships yet"
+            label = tk.Label(parent, text=text, 
+                    bg='#2C2C2C', fg='white', font=('JetBrains Mono', 9))
+            label.pack(anchor='w')
+            rows.append(label)
+            return
+        
+        for relationship in relationships:
+            when = 'same day' if relationship.lag == 0 else (
+                'day before' if relationship.lag == 1 else f'{relationship.lag} days before')
+            row = tk.Frame(parent, bg='#2C2C2C')
+            row.pack(fill='x', pady=2)
+            rows.append(row)
+            
+            tk.Label(row, text=f"{relationship.activity} ({when}) → {relationship.habit}", 
+                    bg='#2C2C2C', fg='white', font=('JetBrains Mono', 9),
+                    width=36, anchor='w').pack(side='left')
+            tk.Label(row, text=f"{relationship.r:+.2f}", 
+                    bg='#2C2C2C', fg='white', font=('JetBrains Mono', 9),
+                    width=6, anchor='e').pack(side='left')
+            
+            # Bar length is |r|: green when the activity goes with doing the habit, red against
+            bar_frame = tk.Frame(row, bg='#404040', height=10)
+            bar_frame.pack(side='right', fill='x', expand=True, padx=(5, 0))
+            bar_color = '#26a641' if relationship.r > 0 else '#d9534f'
+            tk.Frame(bar_frame, bg=bar_color, height=10).place(
+                x=0, y=0, relwidth=abs(relationship.r), height=10)
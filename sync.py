@@ -0,0 +1,193 @@
+import argparse
+import json
+import sqlite3
+import sys
+import uuid
+from typing import List, Tuple
+
+from database import (
+    DB_PATH, get_db_connection, use_database, initialize_database,
+    get_replica_id, get_latest_change, log_change, _sanitize_habit_name, _write_habit_status
+)
+
+# (seq, table_name, row_key, op, payload, changed_at, origin)
+Change = Tuple[int, str, str, str, str, float, str]
+
+class SyncError(Exception):
+    pass
+
+def get_changes_since(cursor: sqlite3.Cursor, since_seq: int, until_seq: int,
+                      exclude_origin: str) -> List[Change]:
+    """Get the latest change per row logged in (since_seq, until_seq].
+
+    Rows whose latest change came from exclude_origin are skipped, since that
+    replica already has them. Only the newest change per row is returned, so
+    the result is bounded by the number of rows touched, not writes made.
+    """
+    cursor.execute('''
+        SELECT c.seq, c.table_name, c.row_key, c.op, c.payload, c.changed_at, c.origin
+        FROM change_log c
+        JOIN (
+            SELECT MAX(seq) AS seq FROM change_log
+            WHERE seq > ? AND seq <= ?
+            GROUP BY table_name, row_key
+        ) latest ON c.seq = latest.seq
+        WHERE c.origin != ?
+        ORDER BY c.seq
+    ''', (since_seq, until_seq, exclude_origin))
+    return cursor.fetchall()
+
+def get_last_seq(cursor: sqlite3.Cursor) -> int:
+    """Get the highest sequence number in the change log."""
+    cursor.execute('SELECT COALESCE(MAX(seq), 0) FROM change_log')
+    return cursor.fetchone()[0]
+
+def apply_change(cursor: sqlite3.Cursor, change: Change) -> bool:
+    """Apply a peer's change using last-writer-wins. Returns True if applied.
+
+    Conflicts are ordered by (changed_at, origin), so both replicas pick the
+    same winner regardless of sync direction or order.
+    """
+    _, table, row_key, op, payload, changed_at, origin = change
+    latest = get_latest_change(cursor, table, row_key)
+    if latest and tuple(latest) >= (changed_at, origin):
+        return False
+
+    data = json.loads(payload) if payload else {}
+    if table == 'activities':
+        date, hour = row_key.split('|', 1)
+        cursor.execute('''
+            INSERT OR REPLACE INTO activities (date, hour, activity)
+            VALUES (?, ?, ?)
+        ''', (date, hour, data['activity']))
+    elif table == 'habits':
+        habit_name, date = row_key.split('|', 1)
+        _write_habit_status(cursor, _sanitize_habit_name(habit_name), date, data['completed'])
+    elif table == 'todo':
+        if op == 'delete':
+            cursor.execute('DELETE FROM todo WHERE uid = ?', (row_key,))
+        else:
+            cursor.execute('''
+                UPDATE todo SET date = ?, task = ?, completed = ?
+                WHERE uid = ?
+            ''', (data['date'], data['task'], data['completed'], row_key))
+            if cursor.rowcount == 0:
+                cursor.execute('''
+                    INSERT INTO todo (date, task, completed, created_at, uid)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', (data['date'], data['task'], data['completed'],
+                      data['created_at'], row_key))
+    else:
+        print(f"Warning: skipping change for unknown table {table}")
+        return False
+
+    log_change(cursor, table, row_key, op, data if payload else None, changed_at, origin)
+    return True
+
+def pull_changes(source: sqlite3.Connection, target: sqlite3.Connection) -> int:
+    """Apply source's changes that target has not seen yet. Returns the number applied."""
+    source_cursor = source.cursor()
+    target_cursor = target.cursor()
+    source_id = get_replica_id(source_cursor)
+    target_id = get_replica_id(target_cursor)
+
+    target_cursor.execute('SELECT last_seq FROM sync_state WHERE peer_id = ?', (source_id,))
+    row = target_cursor.fetchone()
+    since_seq = row[0] if row else 0
+
+    # Read the high-water mark first so changes logged meanwhile are picked up next time
+    last_seq = get_last_seq(source_cursor)
+    changes = get_changes_since(source_cursor, since_seq, last_seq, target_id)
+
+    applied = sum(1 for change in changes if apply_change(target_cursor, change))
+    target_cursor.execute('''
+        INSERT OR REPLACE INTO sync_state (peer_id, last_seq) VALUES (?, ?)
+    ''', (source_id, last_seq))
+    target.commit()
+    return applied
+
+def sync_databases(path_a: str, path_b: str) -> Tuple[int, int]:
+    """Exchange changes between two database files.
+    
+    Returns (changes applied to a, changes applied to b). Raises SyncError
+    when both files have the same replica id, i.e. one is a copy of the
+    other; give the copy its own id with new_replica_id() first.
+    """
+    for path in (path_a, path_b):
+        with use_database(path):
+            initialize_database()
+    
+    with get_db_connection(path_a) as conn_a, get_db_connection(path_b) as conn_b:
+        if get_replica_id(conn_a.cursor()) == get_replica_id(conn_b.cursor()):
+            raise SyncError(f"{path_a} and {path_b} have the same replica id, so one is a copy "
+                            f"of the other; run `python sync.py --new-replica-id {path_b}` first")
+        applied_to_b = pull_changes(conn_a, conn_b)
+        applied_to_a = pull_changes(conn_b, conn_a)
+        return applied_to_a, applied_to_b
+
+def new_replica_id(db_path: str) -> str:
+    """Give a copied database file its own replica id. Returns the new id.
+    
+    Changes logged under the old id are moved to the new one: the file
+    cannot tell writes made before the copy from writes made since, and
+    re-sending the shared ones is harmless (last-writer-wins keeps the same
+    winner), while dropping the new ones would lose them.
+    """
+    with use_database(db_path):
+        initialize_database()
+    
+    with get_db_connection(db_path) as conn:
+        cursor = conn.cursor()
+        old_id, new_id = get_replica_id(cursor), uuid.uuid4().hex
+        cursor.execute("UPDATE meta SET value = ? WHERE key = 'replica_id'", (new_id,))
+        cursor.execute('UPDATE change_log SET origin = ? WHERE origin = ?', (new_id, old_id))
+        conn.commit()
+        return new_id
+
+def compact_change_log(db_path: str = None) -> int:
+    """Drop change log entries superseded by a newer change to the same row.
+
+    Sync only ever sends the newest change per row, so this does not affect
+    what peers receive. Returns the number of entries removed.
+    """
+    with get_db_connection(db_path) as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            DELETE FROM change_log
+            WHERE seq NOT IN (
+                SELECT MAX(seq) FROM change_log GROUP BY table_name, row_key
+            )
+        ''')
+        conn.commit()
+        return cursor.rowcount
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync two lifetrack database files.")
+    parser.add_argument('other', nargs='?', help="database file to sync with")
+    parser.add_argument('--db', default=DB_PATH, help="local database file (default: %(default)s)")
+    parser.add_argument('--compact', action='store_true',
+                        help="compact both change logs after syncing")
+    parser.add_argument('--new-replica-id', metavar='DB',
+                        help="give a copied database file its own replica id and exit")
+    args = parser.parse_args()
+    
+    if args.new_replica_id:
+        print(f"{args.new_replica_id} is now replica {new_replica_id(args.new_replica_id)}")
+        return
+    if args.other is None:
+        parser.error("the database file to sync with is required")
+    
+    try:
+        applied_local, applied_other = sync_databases(args.db, args.other)
+    except SyncError as e:
+        print(f"Sync error: {e}")
+        sys.exit(1)
+    print(f"Applied {applied_local} change(s) to {args.db}")
+    print(f"Applied {applied_other} change(s) to {args.other}")
+
+    if args.compact:
+        removed = compact_change_log(args.db) + compact_change_log(args.other)
+        print(f"Removed {removed} superseded change log entries")
+
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,18 @@
 import tkinter as tk
 from tkinter import messagebox, simpledialog
 from database import (
-    add_task, get_tasks_by_date, update_task_status, delete_task, update_task_text
+    add_task, update_task_status, delete_task, update_task_text
 )
+from instrumentation import latency
+from prefetch import load_snapshot
+from refresh_scheduler import Change, TASK, change_callback
 
 class TodoTracker:
-    def __init__(self, parent, current_date, update_callback=None):
+    def __init__(self, parent, current_date, update_callback=None, prefetcher=None):
         self.parent = parent
         self.current_date = current_date
-        self.update_callback = update_callback
+        self.update_callback = change_callback(update_callback)
+        self.prefetcher = prefetcher
         self.todo_widgets = []
         self.create_widgets()
         self.load_todos()
@@ -34,8 +38,8 @@ class TodoTracker:
         self.todo_frame = tk.Frame(self.main_frame, bg='#2C2C2C')
         self.todo_frame.pack(fill='both', expand=True)
 
-    def load_todos(self):
-        """Load todos for the current date"""
+    def load_todos(self, snapshot=None):
+        """Load todos for the current date (from snapshot if given)"""
         # Clear existing todo widgets
         for widget_group in self.todo_widgets:
             for widget in widget_group:
@@ -43,10 +47,8 @@ class TodoTracker:
         self.todo_widgets.clear()
         
         # Load todos for current date
-        current_date = self.current_date.strftime("%d-%m-%Y")
-        todos = get_tasks_by_date(current_date)
-        
-        for todo in todos:
+        snapshot = snapshot or load_snapshot(self.current_date, self.prefetcher)
+        for todo in snapshot.tasks:
             todo_id, date, task_text, completed = todo
             self._create_todo_widget(todo_id, task_text, completed)
 
@@ -88,7 +90,7 @@ class TodoTracker:
             self.load_todos()
             
             if self.update_callback:
-                self.update_callback()
+                self.update_callback(Change(TASK, self.current_date.strftime("%d-%m-%Y")))
 
     def edit_todo(self, todo_id, current_text):
         """Edit an existing todo"""
@@ -98,7 +100,7 @@ class TodoTracker:
             self.load_todos()
             
             if self.update_callback:
-                self.update_callback()
+                self.update_callback(Change(TASK, self.current_date.strftime("%d-%m-%Y")))
 
     def delete_todo(self, todo_id):
         """Delete a todo"""
@@ -107,17 +109,23 @@ class TodoTracker:
             self.load_todos()
             
             if self.update_callback:
-                self.update_callback()
+                self.update_callback(Change(TASK, self.current_date.strftime("%d-%m-%Y")))
 
     def toggle_todo(self, todo_id, completed):
         """Toggle todo completion status"""
-        update_task_status(todo_id, completed)
-        self.load_todos()
-        
-        if self.update_callback:
-            self.update_callback()
+        with latency.interaction('todo_toggle', self.parent):
+            with latency.stage('database'):
+                update_task_status(todo_id, completed)
+            with latency.stage('reload'):
+                self.load_todos()
+            
+            if self.update_callback:
+                with latency.stage('update_callback'):
+                    self.update_callback(Change(TASK, self.current_date.strftime("%d-%m-%Y")))
 
-    def update_date(self, new_date):
+    def update_date(self, new_date, snapshot=None):
         """Update current date and reload todos"""
         self.current_date = new_date
-        self.load_todos()
\ No newline at end of file
+        self.load_todos(snapshot)
+        if self.prefetcher:
+            self.prefetcher.schedule(new_date)
\ No newline at end of file